@@ -123,7 +123,6 @@ int
 main(int argc, char* argv[])
 {
     std::ofstream g_fileSummary;
-    g_fileSummary.open("wifi-dcf.dat", std::ofstream::app);
     bool printTxStatsSingleLine{true};
 
     uint32_t rngRun{6};
@@ -160,6 +159,9 @@ main(int argc, char* argv[])
     uint64_t acVOCwmin{16};
     uint8_t acVOCwStage{6};
 
+    // Summary output; sweeps pass a run-specific path so concurrent runs never share a file
+    std::string outputFile{"wifi-dcf.dat"};
+
     CommandLine cmd(__FILE__);
     cmd.AddValue("rngRun", "Seed for simulation", rngRun);
     cmd.AddValue("simulationTime", "Simulation time in seconds", simulationTime);
@@ -179,7 +181,9 @@ main(int argc, char* argv[])
     cmd.AddValue("acVICwStage", "Cutoff Stage for AC_VI", acVICwStage);
     cmd.AddValue("acVOCwmin", "Initial CW for AC_VO", acVOCwmin);
     cmd.AddValue("acVOCwStage", "Cutoff Stage for AC_VO", acVOCwStage);
+    cmd.AddValue("outputFile", "File the summary results are appended to", outputFile);
     cmd.Parse(argc, argv);
+    g_fileSummary.open(outputFile, std::ofstream::app);
 
     RngSeedManager::SetSeed(rngRun);
     RngSeedManager::SetRun(rngRun);
@@ -16,6 +16,8 @@
  *
  */
 
+#include "summary-record.h"
+
 #include "ns3/attribute-container.h"
 #include "ns3/bernoulli_packet_socket_client.h"
 #include "ns3/command-line.h"
@@ -48,6 +50,10 @@
 
 #include <array>
 #include <cmath>
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <sstream>
 
 #define PI 3.1415926535
 
@@ -81,12 +87,80 @@ Time slotTime;
 
 WifiPhyRxTraceHelper wifiStats;
 
+// PPDU timeline written by CheckStats: "text" (tx-timeline.txt, CSV in ms) or
+// "binary" (tx-timeline.bin, fixed-width records in ns, see contrib/Project/experiments/utils/timeline.py)
+std::string timelineFormat{"text"};
+std::string timelineFile{""};
+
+// Binary timeline layout: a 16 byte header ("TXTL", version, record size, record count)
+// followed by little-endian records of TIMELINE_RECORD_SIZE bytes:
+// int64 start ns, int64 end ns, uint32 sender, uint32 receiver, uint8 status, uint8 link, 6 bytes padding
+const uint32_t TIMELINE_VERSION = 1;
+const uint32_t TIMELINE_RECORD_SIZE = 32;
+// Status code: 0 for success, the WifiPhyRxfailureReason otherwise, or this for a failed MPDU
+const uint8_t TIMELINE_PAYLOAD_DECODE_ERROR = 255;
+
+uint8_t
+TimelineStatus(const WifiPpduRxRecord& record)
+{
+    if (record.m_reason)
+    {
+        return static_cast<uint8_t>(record.m_reason);
+    }
+    for (const auto& status : record.m_statusPerMpdu)
+    {
+        if (!status)
+        {
+            return TIMELINE_PAYLOAD_DECODE_ERROR;
+        }
+    }
+    return 0;
+}
+
+void
+WriteBinaryTimeline(const std::string& filename)
+{
+    const auto& records = wifiStats.GetPpduRecords();
+    std::ofstream outFile(filename, std::ios::binary);
+    char header[16] = {'T', 'X', 'T', 'L'};
+    uint32_t count = records.size();
+    std::memcpy(header + 4, &TIMELINE_VERSION, 4);
+    std::memcpy(header + 8, &TIMELINE_RECORD_SIZE, 4);
+    std::memcpy(header + 12, &count, 4);
+    outFile.write(header, sizeof(header));
+
+    // Records are packed field by field so the layout doesn't depend on struct padding
+    std::vector<char> buffer(records.size() * TIMELINE_RECORD_SIZE, 0);
+    char* out = buffer.data();
+    for (const auto& record : records)
+    {
+        int64_t start = record.m_startTime.GetNanoSeconds();
+        int64_t end = record.m_endTime.GetNanoSeconds();
+        uint8_t status = TimelineStatus(record);
+        std::memcpy(out, &start, 8);
+        std::memcpy(out + 8, &end, 8);
+        std::memcpy(out + 16, &record.m_senderId, 4);
+        std::memcpy(out + 20, &record.m_receiverId, 4);
+        std::memcpy(out + 24, &status, 1);
+        std::memcpy(out + 25, &record.m_linkId, 1);
+        out += TIMELINE_RECORD_SIZE;
+    }
+    outFile.write(buffer.data(), buffer.size());
+    outFile.close();
+}
+
 void
 CheckStats()
 {
     wifiStats.PrintStatistics();
 
-    std::ofstream outFile("tx-timeline.txt");
+    if (timelineFormat == "binary")
+    {
+        WriteBinaryTimeline(timelineFile.empty() ? "tx-timeline.bin" : timelineFile);
+        return;
+    }
+
+    std::ofstream outFile(timelineFile.empty() ? "tx-timeline.txt" : timelineFile);
     outFile << "Start Time,End Time,Source Node,DropReason\n";
 
     for (const auto& record : wifiStats.GetPpduRecords())
@@ -204,8 +278,6 @@ GetBernoulliClient(const PacketSocketAddress& sockAddr,
 int
 main(int argc, char* argv[])
 {
-    std::ofstream g_fileSummary;
-    g_fileSummary.open("wifi-mld.dat", std::ofstream::app);
     bool printTxStats{false};
     bool printTxStatsSingleLine{true};
     bool printRxStats{false};
@@ -253,6 +325,10 @@ main(int argc, char* argv[])
     uint64_t acVOCwminLink2{16};
     uint8_t acVOCwStageLink2{6};
 
+    // Summary output; sweeps pass a run-specific path so concurrent runs never share a file
+    std::string outputFile{"wifi-mld.dat"};
+    std::string summaryFormat{"csv"};
+
     CommandLine cmd(__FILE__);
     cmd.AddValue("rngRun", "Seed for simulation", rngRun);
     cmd.AddValue("simulationTime", "Simulation time in seconds", simulationTime);
@@ -282,7 +358,24 @@ main(int argc, char* argv[])
     cmd.AddValue("acVICwStageLink2", "Cutoff Stage for AC_VI", acVICwStageLink2);
     cmd.AddValue("acVOCwminLink2", "Initial CW for AC_VO", acVOCwminLink2);
     cmd.AddValue("acVOCwStageLink2", "Cutoff Stage for AC_VO", acVOCwStageLink2);
+    cmd.AddValue("outputFile", "File the summary results are appended to (- for stdout)", outputFile);
+    cmd.AddValue("summaryFormat",
+                 "Format of the summary record: csv, csv-header (named columns) or json",
+                 summaryFormat);
+    cmd.AddValue("printRxStats", "Print PPDU reception statistics and write the tx timeline", printRxStats);
+    cmd.AddValue("timelineFormat", "Format of the tx timeline: text or binary", timelineFormat);
+    cmd.AddValue("timelineFile",
+                 "File the tx timeline is written to (default tx-timeline.txt/.bin)",
+                 timelineFile);
     cmd.Parse(argc, argv);
+    if (timelineFormat != "text" && timelineFormat != "binary")
+    {
+        NS_FATAL_ERROR("Unknown timelineFormat " << timelineFormat << ", use text or binary");
+    }
+    if (summaryFormat != "csv" && summaryFormat != "csv-header" && summaryFormat != "json")
+    {
+        NS_FATAL_ERROR("Unknown summaryFormat " << summaryFormat << ", use csv, csv-header or json");
+    }
     uint8_t nLinks = 0;
 
     RngSeedManager::SetSeed(rngRun);
@@ -894,36 +987,67 @@ main(int argc, char* argv[])
 
     if (printTxStatsSingleLine)
     {
-        g_fileSummary
-            << mldSuccPrLink1 << "," << mldSuccPrLink2 << "," << mldSuccPrTotal << ","
-            << mldThptLink1 << "," << mldThptLink2 << "," << mldThptTotal << ","
-            << mldMeanQueDelayLink1 << "," << mldMeanQueDelayLink2 << "," << mldMeanQueDelayTotal <<
-            ","
-            << mldMeanAccDelayLink1 << "," << mldMeanAccDelayLink2 << "," << mldMeanAccDelayTotal <<
-            ","
-            << mldMeanE2eDelayLink1 << "," << mldMeanE2eDelayLink2 << "," << mldMeanE2eDelayTotal <<
-            ",";
-        // added jitter (second moment, raw/central) results (10 columns)
-        g_fileSummary << mldSecondRawMomentAccDelayLink1 << "," << mldSecondRawMomentAccDelayLink2
-            << "," << mldSecondRawMomentAccDelayTotal << ","
-            << mldSecondCentralMomentAccDelayLink1 << "," << mldSecondCentralMomentAccDelayLink2
-            << "," << mldSecondCentralMomentAccDelayTotal << ",";
+        SummaryRecord record;
+        const std::array<std::string, 3> links{"Link1", "Link2", "Total"};
+        const std::array<std::pair<std::string, std::array<double, 3>>, 7> metrics{{
+            {"mldSuccPr", {mldSuccPrLink1, mldSuccPrLink2, mldSuccPrTotal}},
+            {"mldThpt", {mldThptLink1, mldThptLink2, mldThptTotal}},
+            {"mldMeanQueDelay", {mldMeanQueDelayLink1, mldMeanQueDelayLink2, mldMeanQueDelayTotal}},
+            {"mldMeanAccDelay", {mldMeanAccDelayLink1, mldMeanAccDelayLink2, mldMeanAccDelayTotal}},
+            {"mldMeanE2eDelay", {mldMeanE2eDelayLink1, mldMeanE2eDelayLink2, mldMeanE2eDelayTotal}},
+            // jitter (second moment, raw/central) results
+            {"mldSecondRawMomentAccDelay",
+             {mldSecondRawMomentAccDelayLink1,
+              mldSecondRawMomentAccDelayLink2,
+              mldSecondRawMomentAccDelayTotal}},
+            {"mldSecondCentralMomentAccDelay",
+             {mldSecondCentralMomentAccDelayLink1,
+              mldSecondCentralMomentAccDelayLink2,
+              mldSecondCentralMomentAccDelayTotal}},
+        }};
+        for (const auto& [name, values] : metrics)
+        {
+            for (std::size_t i = 0; i < links.size(); ++i)
+            {
+                AddSummaryField(record, name + links[i], values[i]);
+            }
+        }
 
         // print these input:
-        g_fileSummary << rngRun << "," << simulationTime << "," << payloadSize << ","
-            << mcs << "," << mcs2 << "," << channelWidth << "," << channelWidth2 << ","
-            << nMldSta << "," << mldPerNodeLambda << "," << mldProbLink1 << ","
-            << +mldAcLink1Int << "," << +mldAcLink2Int << ","
-            << acBECwminLink1 << "," << +acBECwStageLink1 << ","
-            << acBKCwminLink1 << "," << +acBKCwStageLink1 << ","
-            << acVICwminLink1 << "," << +acVICwStageLink1 << ","
-            << acVOCwminLink1 << "," << +acVOCwStageLink1 << ","
-            << acBECwminLink2 << "," << +acBECwStageLink2 << ","
-            << acBKCwminLink2 << "," << +acBKCwStageLink2 << ","
-            << acVICwminLink2 << "," << +acVICwStageLink2 << ","
-            << acVOCwminLink2 << "," << +acVOCwStageLink2 << "\n";
+        AddSummaryField(record, "rngRun", rngRun);
+        AddSummaryField(record, "simulationTime", simulationTime);
+        AddSummaryField(record, "payloadSize", payloadSize);
+        AddSummaryField(record, "mcs", mcs);
+        AddSummaryField(record, "mcs2", mcs2);
+        AddSummaryField(record, "channelWidth", channelWidth);
+        AddSummaryField(record, "channelWidth2", channelWidth2);
+        AddSummaryField(record, "nMldSta", nMldSta);
+        AddSummaryField(record, "mldPerNodeLambda", mldPerNodeLambda);
+        AddSummaryField(record, "mldProbLink1", mldProbLink1);
+        AddSummaryField(record, "mldAcLink1Int", +mldAcLink1Int);
+        AddSummaryField(record, "mldAcLink2Int", +mldAcLink2Int);
+        const std::array<std::array<std::pair<uint64_t, uint8_t>, 4>, 2> edca{{
+            {{{acBECwminLink1, acBECwStageLink1},
+              {acBKCwminLink1, acBKCwStageLink1},
+              {acVICwminLink1, acVICwStageLink1},
+              {acVOCwminLink1, acVOCwStageLink1}}},
+            {{{acBECwminLink2, acBECwStageLink2},
+              {acBKCwminLink2, acBKCwStageLink2},
+              {acVICwminLink2, acVICwStageLink2},
+              {acVOCwminLink2, acVOCwStageLink2}}},
+        }};
+        const std::array<std::string, 4> acs{"BE", "BK", "VI", "VO"};
+        for (std::size_t link = 0; link < edca.size(); ++link)
+        {
+            for (std::size_t ac = 0; ac < acs.size(); ++ac)
+            {
+                auto suffix = "Link" + std::to_string(link + 1);
+                AddSummaryField(record, "ac" + acs[ac] + "Cwmin" + suffix, edca[link][ac].first);
+                AddSummaryField(record, "ac" + acs[ac] + "CwStage" + suffix, +edca[link][ac].second);
+            }
+        }
+        WriteSummary(outputFile, summaryFormat, record);
     }
-    g_fileSummary.close();
     Simulator::Destroy();
     return 0;
 }
\ No newline at end of file
@@ -19,6 +19,8 @@
  * EE 595 Final Project
  */
 
+#include "summary-record.h"
+
 #include "ns3/attribute-container.h"
 #include "ns3/bernoulli_packet_socket_client.h"
 #include "ns3/command-line.h"
@@ -50,6 +52,9 @@
 
 #include <array>
 #include <cmath>
+#include <fstream>
+#include <iostream>
+#include <sstream>
 
 #define PI 3.1415926535
 
@@ -122,8 +127,6 @@ GetBernoulliClient(const PacketSocketAddress& sockAddr,
 int
 main(int argc, char* argv[])
 {
-    std::ofstream g_fileSummary;
-    g_fileSummary.open("wifi-dcf.dat", std::ofstream::app);
     bool printTxStatsSingleLine{true};
 
     uint32_t rngRun{6};
@@ -170,6 +173,10 @@ main(int argc, char* argv[])
 
     std::string nodeAcsStr;
 
+    // Summary output; sweeps pass a run-specific path so concurrent runs never share a file
+    std::string outputFile{"wifi-dcf.dat"};
+    std::string summaryFormat{"csv"};
+
     CommandLine cmd(__FILE__);
     cmd.AddValue("rngRun", "Seed for simulation", rngRun);
     cmd.AddValue("simulationTime", "Simulation time in seconds", simulationTime);
@@ -198,7 +205,15 @@ main(int argc, char* argv[])
     cmd.AddValue("acVOCwmin", "Initial CW for AC_VO", acVOCwmin);
     cmd.AddValue("acVOCwStage", "Cutoff Stage for AC_VO", acVOCwStage);
     cmd.AddValue("nodeAcs", "Comma-separated ACs for nodes (0=BE, 1=BK, 2=VI, 3=VO)", nodeAcsStr);
+    cmd.AddValue("outputFile", "File the summary results are appended to (- for stdout)", outputFile);
+    cmd.AddValue("summaryFormat",
+                 "Format of the summary record: csv, csv-header (named columns) or json",
+                 summaryFormat);
     cmd.Parse(argc, argv);
+    if (summaryFormat != "csv" && summaryFormat != "csv-header" && summaryFormat != "json")
+    {
+        NS_FATAL_ERROR("Unknown summaryFormat " << summaryFormat << ", use csv, csv-header or json");
+    }
 
     RngSeedManager::SetSeed(rngRun);
     RngSeedManager::SetRun(rngRun);
@@ -767,6 +782,7 @@ main(int argc, char* argv[])
     double sldMeanE2eDelay = sldMeanQueDelay + sldMeanAccDelay;
     
     // Calculate throughput and delay 
+    std::vector<SummaryRecord> nodes;
     for (uint32_t i = 1; i < 1 + nSld; ++i) {
         uint64_t numSuccessPerNode = 0;
         for (const auto& records : successInfo[i]) {
@@ -787,32 +803,35 @@ main(int argc, char* argv[])
         double nodeMeanAccDelay = numSuccessPerNode > 0 ? nodeTotalAccDelay / numSuccessPerNode : 0;
         double nodeMeanE2eDelay = nodeMeanQueDelay + nodeMeanAccDelay;
 
-        g_fileSummary << i << "," // Node ID
-                    << nodeThpt << ","
-                    << nodeMeanQueDelay << ","
-                    << nodeMeanAccDelay << ","
-                    << nodeMeanE2eDelay << "\n";
+        SummaryRecord node;
+        AddSummaryField(node, "node", i);
+        AddSummaryField(node, "nodeThpt", nodeThpt);
+        AddSummaryField(node, "nodeMeanQueDelay", nodeMeanQueDelay);
+        AddSummaryField(node, "nodeMeanAccDelay", nodeMeanAccDelay);
+        AddSummaryField(node, "nodeMeanE2eDelay", nodeMeanE2eDelay);
+        nodes.push_back(node);
     }
 
+    SummaryRecord record;
     if (printTxStatsSingleLine)
     {
-        g_fileSummary << sldSuccPr << ","
-            << sldThpt << ","
-            << sldMeanQueDelay << ","
-            << sldMeanAccDelay << ","
-            << sldMeanE2eDelay << ","
-            << rngRun << ","
-            << simulationTime << ","
-            << payloadSize << ","
-            << mcs << ","
-            << channelWidth << ","
-            << nSld << ","
-            << perSldLambda << ","
-            // << +sldAcInt1 << ","
-            << acBECwmin << ","
-            << +acBECwStage << "\n";
+        AddSummaryField(record, "sldSuccPr", sldSuccPr);
+        AddSummaryField(record, "sldThpt", sldThpt);
+        AddSummaryField(record, "sldMeanQueDelay", sldMeanQueDelay);
+        AddSummaryField(record, "sldMeanAccDelay", sldMeanAccDelay);
+        AddSummaryField(record, "sldMeanE2eDelay", sldMeanE2eDelay);
+        AddSummaryField(record, "rngRun", rngRun);
+        AddSummaryField(record, "simulationTime", simulationTime);
+        AddSummaryField(record, "payloadSize", payloadSize);
+        AddSummaryField(record, "mcs", mcs);
+        AddSummaryField(record, "channelWidth", channelWidth);
+        AddSummaryField(record, "nSld", nSld);
+        AddSummaryField(record, "perSldLambda", perSldLambda);
+        // AddSummaryField(record, "sldAcInt", +sldAcInt1);
+        AddSummaryField(record, "acBECwmin", acBECwmin);
+        AddSummaryField(record, "acBECwStage", +acBECwStage);
     }
-    g_fileSummary.close();
+    WriteSummary(outputFile, summaryFormat, record, nodes);
     Simulator::Destroy();
     return 0;
 }
\ No newline at end of file
@@ -0,0 +1,125 @@
+/*
+ * Copyright (c) 2024
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+ *
+ */
+
+#ifndef SUMMARY_RECORD_H
+#define SUMMARY_RECORD_H
+
+// Summary output of the single-bss examples (--outputFile, --summaryFormat)
+
+#include <cstddef>
+#include <fstream>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <utility>
+#include <vector>
+
+// Summary record of a run: (column name, value as printed) pairs in output order.
+// Column names match contrib/Project/experiments/utils/store.py.
+using SummaryRecord = std::vector<std::pair<std::string, std::string>>;
+
+template <typename T>
+void
+AddSummaryField(SummaryRecord& record, const std::string& name, const T& value)
+{
+    std::ostringstream os;
+    os << value;
+    record.emplace_back(name, os.str());
+}
+
+// One JSON object; nan/inf are not valid JSON numbers and become null
+inline std::string
+SummaryJson(const SummaryRecord& record)
+{
+    std::ostringstream os;
+    os << "{";
+    for (std::size_t i = 0; i < record.size(); ++i)
+    {
+        const auto& [name, value] = record[i];
+        bool number = value.find_first_of("ni") == std::string::npos;
+        os << (i ? ", " : "") << "\"" << name << "\": " << (number ? value : "null");
+    }
+    os << "}";
+    return os.str();
+}
+
+// Appends the per-node records (if any) and the summary record to filename ("-" for stdout) as
+//   csv:        the unlabeled per-node lines, then the summary line (the original format)
+//   csv-header: the summary line only, after a header line of column names if the file is new
+//   json:       one JSON object per line, with the per-node records in its "nodes" list
+inline void
+WriteSummary(const std::string& filename,
+             const std::string& format,
+             const SummaryRecord& record,
+             const std::vector<SummaryRecord>& nodes = {})
+{
+    std::ofstream file;
+    bool newFile = true;
+    if (filename != "-")
+    {
+        newFile = std::ifstream(filename, std::ios::ate).tellg() <= 0;
+        file.open(filename, std::ofstream::app);
+    }
+    std::ostream& out = filename == "-" ? std::cout : file;
+    if (format == "json")
+    {
+        auto json = SummaryJson(record);
+        if (!nodes.empty())
+        {
+            json.pop_back();
+            json += record.empty() ? "\"nodes\": [" : ", \"nodes\": [";
+            for (std::size_t i = 0; i < nodes.size(); ++i)
+            {
+                json += (i ? ", " : "") + SummaryJson(nodes[i]);
+            }
+            json += "]}";
+        }
+        out << json << "\n";
+        return;
+    }
+    if (format == "csv")
+    {
+        for (const auto& node : nodes)
+        {
+            for (std::size_t i = 0; i < node.size(); ++i)
+            {
+                out << (i ? "," : "") << node[i].second;
+            }
+            out << "\n";
+        }
+    }
+    if (record.empty())
+    {
+        return;
+    }
+    if (format == "csv-header" && newFile)
+    {
+        for (std::size_t i = 0; i < record.size(); ++i)
+        {
+            out << (i ? "," : "") << record[i].first;
+        }
+        out << "\n";
+    }
+    for (std::size_t i = 0; i < record.size(); ++i)
+    {
+        out << (i ? "," : "") << record[i].second;
+    }
+    out << "\n";
+}
+
+#endif /* SUMMARY_RECORD_H */
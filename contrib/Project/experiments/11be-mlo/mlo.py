@@ -1,19 +1,23 @@
+import argparse
+import json
 import os
 import subprocess
 import numpy as np
 import subprocess
-import multiprocessing
 import shutil
 import signal
 import sys
 from datetime import datetime
 import matplotlib.pyplot as plt
 
-def runNs3Cmd(cmd):
-    proc = subprocess.Popen(cmd, shell=True)
-    proc.wait()
-    print(f'Completed Command: {cmd}')
-    return
+#Shared experiment helpers live in ../utils
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.cache import ResultCache, submit_cached
+from utils.ns3_target import Ns3Target
+from utils.results import (DEFAULT_OVERWRITE, OVERWRITE_POLICIES, RunOutputs, atomic_write,
+                           check_and_remove)
+from utils.spec import find_resumable
+from utils.sweep import SweepExecutor
 
 def control_c(signum, frame):
     print("exiting")
@@ -22,6 +26,14 @@ def control_c(signum, frame):
 signal.signal(signal.SIGINT, control_c)
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--overwrite', choices=OVERWRITE_POLICIES, default=DEFAULT_OVERWRITE,
+                        help='what to do with an existing wifi-mld.dat in the ns-3 directory')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the latest results directory of this sweep, '
+                             'skipping the runs its journal records as done')
+    args = parser.parse_args()
+
     dirname = '11be-mlo'
     ns3_path = os.path.join('../../../../ns3')
     
@@ -30,16 +42,15 @@ def main():
         print(f"Please run this program from within the correct directory.")
         sys.exit(1)
 
-    results_dir = os.path.join(os.getcwd(), 'results', f"{dirname}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
-    os.system('mkdir -p ' + results_dir)
+    results_parent = os.path.join(os.getcwd(), 'results')
 
 
     # Move to ns3 top-level directory
     os.chdir('../../../../')
     
 
-    # Check for existing data files and prompt for removal
-    check_and_remove('wifi-mld.dat')
+    # Apply the overwrite policy to a stale data file (no prompt, the sweep runs unattended)
+    check_and_remove('wifi-mld.dat', args.overwrite)
 
     # Experiment parameters
     rng_run = 1
@@ -55,21 +66,35 @@ def main():
     #     lambdas.append(lambda_val)
     #     cmd = f"./ns3 run 'single-bss-mld --rngRun={rng_run} --payloadSize={max_packets} --mldPerNodeLambda={lambda_val}'"
     #     subprocess.run(cmd, shell=True)
-    processes = []
-    for lam in np.arange(min_lambda, max_lambda + step_size, step_size):
-        lambda_val = 10 ** lam
+    lambda_values = [10 ** lam for lam in np.arange(min_lambda, max_lambda + step_size, step_size)]
+    #Saved as spec.json, so --resume can find an earlier directory of the same sweep
+    sweep = {'program': 'single-bss-mld', 'output': 'wifi-mld.dat',
+             'params': {'rngRun': rng_run, 'payloadSize': max_packets},
+             'mldPerNodeLambda': lambda_values}
+    results_dir = find_resumable(results_parent, sweep) if args.resume else None
+    if results_dir is None:
+        results_dir = os.path.join(results_parent, f"{dirname}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    #Created as .partial-<name> by RunOutputs and renamed once the sweep is complete
+
+    #One output file per run under results_dir/runs, merged after the sweep
+    outputs = RunOutputs(results_dir, 'wifi-mld.dat')
+    if os.path.exists(os.path.join(outputs.results_dir, 'spec.json')):
+        print(f'Resuming {outputs.results_dir}, journal: {outputs.journal.counts()}')
+    atomic_write(os.path.join(outputs.results_dir, 'spec.json'), json.dumps(sweep, indent=2))
+
+    #Resolve and build the program once, then exec the binary for every point
+    program = Ns3Target('single-bss-mld')
+    executor = SweepExecutor()
+    #Points already simulated with this code are copied from the cache
+    cache = ResultCache()
+    for lambda_val in lambda_values:
         lambdas.append(lambda_val)
-        cmd = f"./ns3 run 'single-bss-mld --rngRun={rng_run} --payloadSize={max_packets} --mldPerNodeLambda={lambda_val}'"
-        print(f'Executing Command: {cmd}')
-
-        p = multiprocessing.Process(target=runNs3Cmd, args=(cmd,))
-        p.start()
-        processes.append(p)
+        params = {'rngRun': rng_run, 'payloadSize': max_packets, 'mldPerNodeLambda': lambda_val}
+        submit_cached(executor, program, outputs, cache, params)
 
         #os.system(min_command)
-    #Synchronize threads
-    for p in processes:
-        p.join()
+    #Wait for every point to finish
+    executor.run()
     # draw plots
     # plt.figure()
     # plt.title('Throughput vs. Offered Load')
@@ -91,29 +116,19 @@ def main():
     # plt.plot(lambdas, throughput_l2, marker='x')
     # plt.plot(lambdas, throughput_total, marker='^')
     # plt.savefig(os.path.join(results_dir, 'wifi-mld.png'))
-    # Move result files to the experiment directory
-    move_file('wifi-mld.dat', results_dir)
+    # Merge the per-run result files into the experiment directory
+    missing = outputs.merge()
 
 
     # Save the git commit information
-    with open(os.path.join(results_dir, 'git-commit.txt'), 'w') as f:
+    with open(os.path.join(outputs.results_dir, 'git-commit.txt'), 'w') as f:
         commit_info = subprocess.run(['git', 'show', '--name-only'], stdout=subprocess.PIPE)
         f.write(commit_info.stdout.decode())
 
-    
-def check_and_remove(filename):
-    if os.path.exists(filename):
-        response = input(f"Remove existing file {filename}? [Yes/No]: ").strip().lower()
-        if response == 'yes':
-            os.remove(filename)
-            print(f"Removed {filename}")
-        else:
-            print("Exiting...")
-            sys.exit(1)
-
-def move_file(filename, destination_dir):
-    if os.path.exists(filename):
-        shutil.move(filename, destination_dir)
+    # The results directory only gets its final name once every run has finished
+    if not missing:
+        outputs.publish()
 
+    
 if __name__ == "__main__":
     main()
@@ -14,6 +14,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+from utils.inprocess import run_points
+
 def Q1a(results_dir):
     '''Test Link Performance and Packet Size'''
     os.system("echo 'Q1a -- Testing Link Performance versus Packet Size'")
@@ -73,34 +75,34 @@ def Q1b(results_dir):
     #Variable
     distances = list(range(25, 80, 1)) #Creates range of distances from 25-80
 
-    for d in distances:
-        print(f'Distance: {d}')
-        command = (f'./ns3 run "link-performance --distance={d} '
-        f'--maxPackets={max_packets} --transmitPower={transmit_power} '
-        f'--noisePower={noise_power} --frequency={frequency} '
-        f'--packetSize={packet_size} --lossModelType={loss_model_type} --metadata={d}"')
-        os.system(command)
-
-    #Move Experiment files to results directory
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     dir = os.path.join(results_dir, "Q1b", timestamp)
     os.makedirs(dir, exist_ok=True)
-    #Rename file to include packet size
-    os.system(f'mv ./link-performance-summary.dat {dir}/link-performance-summary-100B.dat')
 
-    #Now repeat with packet size of 1000B
-    packet_size = 1000
-
-    for d in distances:
-        print(f'Distance: {d}')
-        command = (f'./ns3 run "link-performance --distance={d} '
-        f'--maxPackets={max_packets} --transmitPower={transmit_power} '
-        f'--noisePower={noise_power} --frequency={frequency} '
-        f'--packetSize={packet_size} --lossModelType={loss_model_type} --metadata={d}"')
-        os.system(command)
-
-    #Rename file to include packet size
-    os.system(f'mv ./link-performance-summary.dat {dir}/link-performance-summary-1000B.dat')
+    #Each run is a fraction of a second of simulation, so the runs share long-lived workers
+    #that load ns-3 once (utils/inprocess.py) instead of starting a process for every point;
+    #without the Python bindings every point runs as its own process
+    points = []
+    #Packet size of 100B, then repeated with 1000B
+    for size in (packet_size, 1000):
+        for d in distances:
+            params = {'distance': d, 'maxPackets': max_packets, 'transmitPower': transmit_power,
+                      'noisePower': noise_power, 'frequency': frequency, 'packetSize': size,
+                      'lossModelType': loss_model_type, 'metadata': d}
+            #Every run writes its summary into its own directory
+            points.append((params, os.path.join(dir, 'runs', f'{size}B-{d}')))
+    for (params, cwd), code in zip(points, run_points('link-performance', points)):
+        if code != 0:
+            print(f'Packet Size {params["packetSize"]}B, Distance {params["distance"]} failed, see {cwd}.log')
+
+    #Collect the summaries in distance order, one file per packet size
+    for size in (packet_size, 1000):
+        with open(f'{dir}/link-performance-summary-{size}B.dat', 'w') as summary:
+            for d in distances:
+                cwd = os.path.join(dir, 'runs', f'{size}B-{d}')
+                if os.path.exists(cwd + '/link-performance-summary.dat'):
+                    with open(cwd + '/link-performance-summary.dat') as f:
+                        summary.write(f.read())
 
     #Plot results
     dataA = np.loadtxt(dir+'/link-performance-summary-100B.dat', delimiter=' ')
@@ -0,0 +1,62 @@
+"""
+Runs experiments described in a spec file (see utils/spec.py).
+
+Usage:
+    python run.py specs/Lab2.toml P1b           # one experiment
+    python run.py specs/Lab2.toml               # every experiment in the file
+    python run.py specs/Lab1.toml P1a P1b -j 8
+    python run.py specs/Lab2.toml P1b --resume  # continue the last interrupted P1b sweep
+
+Results go to results/<spec file name>/<experiment>/<timestamp>, the same layout the
+Lab drivers use.
+"""
+
+import argparse
+import os
+import sys
+
+from utils.catalog import connect, update_catalog
+from utils.plotting import figure_jobs, render_figures
+from utils.spec import load_spec, run_spec
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run experiments from a spec file')
+    parser.add_argument('spec', help='spec file (.toml, .json or .yaml)')
+    parser.add_argument('experiments', nargs='*', help='experiments to run (default: all)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='upper bound on concurrent simulations (default: cores/free RAM)')
+    parser.add_argument('--results-dir', default=None,
+                        help='parent results directory (default: results/<spec file name>)')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the latest results directory of the same spec, '
+                             'skipping the runs its journal records as done')
+    args = parser.parse_args()
+
+    specs = load_spec(args.spec)
+    names = args.experiments or list(specs)
+    unknown = [name for name in names if name not in specs]
+    if unknown:
+        print(f'Unknown experiments {unknown}, {args.spec} defines {list(specs)}')
+        return 1
+
+    experiments_dir = os.path.dirname(os.path.abspath(__file__))
+    results_dir = args.results_dir or os.path.join(experiments_dir, 'results',
+                                                  os.path.splitext(os.path.basename(args.spec))[0])
+    figures = []
+    for name in names:
+        dir = run_spec(specs[name], os.path.abspath(results_dir), name, max_workers=args.jobs,
+                       resume=args.resume)
+        print(f'{name}: results in {dir}')
+        figures += figure_jobs(specs[name], dir)
+    #Figures of every experiment are drawn together, headless, in one process pool
+    render_figures(figures, max_workers=args.jobs)
+    #Make the new results queryable across runs
+    db = connect()
+    update_catalog(db)
+    db.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Tests of utils/occupancy.py against brute-force loops over small random timelines.
+
+Usage (from contrib/Project/experiments):
+    python -m unittest discover tests
+"""
+
+import unittest
+
+import numpy as np
+
+from utils.occupancy import (airtime, analyze, busy_intervals, collided, overlap_intervals,
+                             transmissions)
+from utils.timeline import TIMELINE_DTYPE
+
+HORIZON = 300
+
+
+def random_timeline(seed, n=60, receivers=3):
+    '''n PPDUs on two links in [0, HORIZON) ns, each logged once per receiver'''
+    rng = np.random.default_rng(seed)
+    ppdus = np.zeros(n, TIMELINE_DTYPE)
+    ppdus['start'] = rng.integers(0, HORIZON - 40, n)
+    ppdus['end'] = ppdus['start'] + rng.integers(1, 40, n)
+    ppdus['sender'] = rng.integers(0, 4, n)
+    ppdus['link'] = rng.integers(0, 2, n)
+    copies = []
+    for receiver in range(receivers):
+        copy = ppdus.copy()
+        copy['receiver'] = receiver
+        copies.append(copy)
+    timeline = np.concatenate(copies)
+    return timeline[rng.permutation(len(timeline))]
+
+
+def distinct_ppdus(timeline, link):
+    '''Sorted (start, end, sender) tuples of the PPDUs on a link, the slow way'''
+    return sorted({(int(r['start']), int(r['end']), int(r['sender']))
+                   for r in timeline if r['link'] == link})
+
+
+def coverage(ppdus):
+    '''Number of PPDUs on the air in every ns of the horizon'''
+    cover = np.zeros(HORIZON, dtype=int)
+    for start, end, _ in ppdus:
+        cover[start:end] += 1
+    return cover
+
+
+class OccupancyTestCase(unittest.TestCase):
+
+    def test_transmissions(self):
+        for seed in range(5):
+            timeline = random_timeline(seed)
+            for link in (0, 1):
+                start, end, sender = transmissions(timeline, link)
+                #One copy of every PPDU, sorted by start, then sender
+                expected = sorted(distinct_ppdus(timeline, link), key=lambda p: (p[0], p[2], p[1]))
+                self.assertEqual(list(zip(start.tolist(), end.tolist(), sender.tolist())), expected)
+
+    def test_busy_and_overlap_time(self):
+        for seed in range(20):
+            timeline = random_timeline(seed)
+            for link in (0, 1):
+                ppdus = distinct_ppdus(timeline, link)
+                cover = coverage(ppdus)
+                start, end, _ = transmissions(timeline, link)
+                busy_start, busy_end = busy_intervals(start, end)
+                self.assertEqual(int((busy_end - busy_start).sum()), int((cover >= 1).sum()))
+                #Busy periods are disjoint and separated by idle time
+                self.assertTrue((busy_start[1:] > busy_end[:-1]).all())
+                overlap_start, overlap_end = overlap_intervals(start, end)
+                self.assertEqual(int((overlap_end - overlap_start).sum()), int((cover >= 2).sum()))
+                triple_start, triple_end = overlap_intervals(start, end, depth=3)
+                self.assertEqual(int((triple_end - triple_start).sum()), int((cover >= 3).sum()))
+
+    def test_collided(self):
+        for seed in range(20):
+            timeline = random_timeline(seed)
+            for link in (0, 1):
+                start, end, _ = transmissions(timeline, link)
+                expected = [any(max(start[i], start[j]) < min(end[i], end[j])
+                                for j in range(len(start)) if j != i)
+                            for i in range(len(start))]
+                self.assertEqual(collided(start, end).tolist(), expected)
+
+    def test_back_to_back_ppdus_do_not_collide(self):
+        start = np.array([0, 10, 20])
+        end = np.array([10, 20, 25])
+        self.assertFalse(collided(start, end).any())
+        self.assertEqual(len(overlap_intervals(start, end)[0]), 0)
+        busy_start, busy_end = busy_intervals(start, end)
+        self.assertEqual((busy_start.tolist(), busy_end.tolist()), ([0], [25]))
+
+    def test_airtime(self):
+        timeline = random_timeline(7)
+        start, end, sender = transmissions(timeline, 0)
+        senders, per_sender = airtime(start, end, sender)
+        for s, total in zip(senders.tolist(), per_sender.tolist()):
+            expected = sum(e - b for b, e, who in distinct_ppdus(timeline, 0) if who == s)
+            self.assertEqual(total, expected)
+
+    def test_analyze(self):
+        timeline = random_timeline(3)
+        stats = analyze(timeline)
+        self.assertEqual(sorted(stats), [0, 1])
+        for link, link_stats in stats.items():
+            ppdus = distinct_ppdus(timeline, link)
+            cover = coverage(ppdus)
+            span = max(end for _, end, _ in ppdus) - min(start for start, _, _ in ppdus)
+            self.assertEqual(link_stats['ppdus'], len(ppdus))
+            self.assertAlmostEqual(link_stats['busy_fraction'], (cover >= 1).sum() / span)
+            self.assertAlmostEqual(link_stats['collision_time_fraction'],
+                                   (cover >= 2).sum() / (cover >= 1).sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Tests of the Student t quantiles in utils/replication.py against t-table values.
+
+Usage (from contrib/Project/experiments):
+    python -m unittest discover tests
+"""
+
+import math
+import unittest
+from unittest import mock
+
+from utils import replication
+from utils.replication import half_width, t_quantile
+
+#(p, df, quantile) from a Student t table, three decimals
+T_TABLE = [
+    (0.975, 1, 12.706),
+    (0.975, 2, 4.303),
+    (0.975, 3, 3.182),
+    (0.975, 4, 2.776),
+    (0.975, 5, 2.571),
+    (0.975, 10, 2.228),
+    (0.975, 30, 2.042),
+    (0.95, 5, 2.015),
+    (0.995, 3, 5.841),
+    (0.995, 9, 3.250),
+]
+
+
+class TQuantileTestCase(unittest.TestCase):
+
+    def check_table(self):
+        for p, df, expected in T_TABLE:
+            with self.subTest(p=p, df=df):
+                self.assertAlmostEqual(t_quantile(p, df), expected, places=3)
+                #Symmetric around 0
+                self.assertAlmostEqual(t_quantile(1 - p, df), -expected, places=3)
+
+    def test_table(self):
+        self.check_table()
+
+    def test_table_without_scipy(self):
+        with mock.patch.object(replication, 'scipy_stats', None):
+            self.check_table()
+            self.assertAlmostEqual(t_quantile(0.5, 7), 0.0)
+
+    def test_half_width(self):
+        #t(0.975, 2) * stdev / sqrt(n) with stdev 1 and n 3
+        self.assertAlmostEqual(half_width([1, 2, 3], 0.95), 4.303 / math.sqrt(3), places=3)
+        self.assertEqual(half_width([1], 0.95), math.inf)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Tests of the sweep expansion in utils/spec.py.
+
+Usage (from contrib/Project/experiments):
+    python -m unittest discover tests
+"""
+
+import os
+import unittest
+
+import numpy as np
+
+from utils.spec import SPEC_DIR, arange, axis_values, expand, load_spec
+
+
+class ArangeTestCase(unittest.TestCase):
+
+    def test_matches_numpy(self):
+        for bounds in [(0, 5, 1), (5, 31, 5), (-4.0, 0, 0.5), (-6, -0.75, 0.25), (0, 1, 0.1),
+                       (1, 1, 1), (3, 1, 1)]:
+            with self.subTest(bounds=bounds):
+                self.assertEqual(arange(*bounds), np.arange(*bounds).tolist())
+
+
+class ExpandTestCase(unittest.TestCase):
+
+    def test_axis_values(self):
+        self.assertEqual(axis_values('n', [1, 3]), [1, 3])
+        self.assertEqual(axis_values('n', {'range': [5, 20, 5]}), [5, 10, 15])
+        self.assertEqual(axis_values('lambda', {'logrange': [-2, 1, 1]}), [0.01, 0.1, 1])
+        for bad in [3, {'range': [0, 1, 1], 'logrange': [0, 1, 1]}, {'steps': [0, 1]}]:
+            with self.assertRaises(ValueError):
+                axis_values('n', bad)
+
+    def test_cartesian_product(self):
+        spec = {'params': {'payloadSize': 1500}, 'seed': 3, 'replications': 2,
+                'sweep': [{'n': {'range': [1, 3, 1]}}, {'lambda': {'logrange': [-1, 1, 1]}}]}
+        runs = expand(spec)
+        #Outermost axis first, replications innermost
+        self.assertEqual([(run['n'], run['lambda'], run['rngRun']) for run in runs], [
+            (1, 0.1, 3), (1, 0.1, 4), (1, 1, 3), (1, 1, 4),
+            (2, 0.1, 3), (2, 0.1, 4), (2, 1, 3), (2, 1, 4),
+        ])
+        self.assertTrue(all(run['payloadSize'] == 1500 for run in runs))
+
+    def test_several_axes_in_one_entry(self):
+        runs = expand({'sweep': [{'a': [1, 2], 'b': ['x', 'y']}]})
+        self.assertEqual([(run['a'], run['b']) for run in runs],
+                         [(1, 'x'), (1, 'y'), (2, 'x'), (2, 'y')])
+
+    def test_zip(self):
+        spec = {'sweep': [{'zip': {'n': [1, 2, 3], 'cw': {'range': [16, 64, 16]}}},
+                          {'lambda': [0.5, 1]}]}
+        runs = expand(spec)
+        self.assertEqual([(run['n'], run['cw'], run['lambda']) for run in runs], [
+            (1, 16, 0.5), (1, 16, 1), (2, 32, 0.5), (2, 32, 1), (3, 48, 0.5), (3, 48, 1),
+        ])
+        self.assertTrue(all(run['rngRun'] == 1 for run in runs))
+
+    def test_zip_of_different_lengths(self):
+        spec = {'sweep': [{'zip': {'n': [1, 2, 3], 'cw': {'range': [16, 48, 16]}}}]}
+        with self.assertRaises(ValueError):
+            expand(spec)
+
+    def test_no_sweep(self):
+        self.assertEqual(expand({'params': {'a': 1}}), [{'a': 1, 'rngRun': 1}])
+
+    def test_lab_specs_expand(self):
+        for filename in ['Lab1.toml', 'Lab2.toml']:
+            for name, spec in load_spec(os.path.join(SPEC_DIR, filename)).items():
+                with self.subTest(spec=filename, experiment=name):
+                    self.assertGreater(len(expand(spec)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
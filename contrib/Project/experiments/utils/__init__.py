@@ -0,0 +1,3 @@
+"""
+Shared helpers for the experiment drivers (Lab0/Lab1/Lab2, 11be-mlo, wifi-dcf, Final_Sim).
+"""
@@ -0,0 +1,158 @@
+"""
+Adaptive refinement of the throughput knee (saturation point) of a load sweep.
+
+P1b-style questions ("at which lambda does the network saturate for n stations?") were
+answered by running a fixed log grid and eyeballing the knee. Here the spec's grid is only
+the coarse pass: for every combination of the other parameters, the two grid points that
+bracket the knee are found and only that interval is subdivided, round after round, until
+it is narrower than the tolerance.
+
+The knee is the smallest load whose metric (e.g. aggregate throughput) reaches
+`fraction` of the group's plateau (its largest value). Spec options:
+
+    [P1b.adaptive]
+    axis = "mldPerNodeLambda"   # load parameter that is refined
+    metric = "mldThptTotal"     # summary column, by name (see utils/store.py)
+    fraction = 0.95             # share of the plateau that counts as saturated
+    tolerance = 0.05            # stop when log10(hi/lo) of the bracket is below this
+    points = 3                  # new points per bracket and round
+    max_rounds = 6
+"""
+
+import math
+import os
+
+from utils.cache import submit_cached
+from utils.results import atomic_write
+from utils.store import read_summary
+
+DEFAULT_FRACTION = 0.95
+DEFAULT_TOLERANCE = 0.05
+DEFAULT_POINTS = 3
+DEFAULT_MAX_ROUNDS = 6
+
+
+def check_metric(name):
+    '''Rejects metrics given as column positions, which break when columns are added'''
+    if not isinstance(name, str):
+        raise ValueError(f'Metric {name!r} must be a summary column name, e.g. "mldThptTotal"')
+    return name
+
+
+def read_metric(output, name):
+    '''Value of the named column in the summary row of a run's output file, or None'''
+    try:
+        summary = read_summary(output)
+    except (OSError, ValueError):
+        #No output (failed run) or no summary row in it
+        return None
+    if summary is None or name not in summary:
+        return None
+    return summary[name]
+
+
+def _group_key(params, axis):
+    '''Parameters identifying the curve a run belongs to (everything but load and seed)'''
+    return tuple((name, value) for name, value in params.items() if name not in (axis, 'rngRun'))
+
+
+class KneeSearch:
+    '''Bracket of the saturation point of one curve'''
+
+    def __init__(self, group):
+        self.group = dict(group)
+        self.seeds = []
+        self.points = {}        #load -> list of metric values (one per seed)
+        self.lo = None
+        self.hi = None
+        self.converged = False
+        self.note = ''
+
+    def add(self, load, value):
+        if value is not None:
+            self.points.setdefault(load, []).append(value)
+
+    def update(self, fraction, tolerance):
+        '''Re-brackets the knee from all points so far and checks the tolerance'''
+        curve = sorted((load, sum(values) / len(values)) for load, values in self.points.items())
+        if not curve:
+            self.converged = True
+            self.note = 'no results'
+            return
+        threshold = fraction * max(value for _, value in curve)
+        idx = next(i for i, (_, value) in enumerate(curve) if value >= threshold)
+        if idx == 0:
+            #Saturated already at the lowest load, the grid has to start lower
+            self.lo = self.hi = curve[0][0]
+            self.converged = True
+            self.note = 'saturated at lowest load'
+            return
+        self.lo, self.hi = curve[idx - 1][0], curve[idx][0]
+        if math.log10(self.hi / self.lo) <= tolerance:
+            self.converged = True
+
+    def refine(self, points):
+        '''Loads splitting the bracket into points+1 equal parts on a log scale'''
+        ratio = self.hi / self.lo
+        return [self.lo * ratio ** (k / (points + 1)) for k in range(1, points + 1)]
+
+    @property
+    def estimate(self):
+        '''Saturation load: geometric middle of the final bracket'''
+        if self.lo is None:
+            return None
+        return math.sqrt(self.lo * self.hi)
+
+
+def refine_knee(executor, program, outputs, cache, runs, axis, metric, fraction=DEFAULT_FRACTION,
+                tolerance=DEFAULT_TOLERANCE, points=DEFAULT_POINTS, max_rounds=DEFAULT_MAX_ROUNDS):
+    '''Runs the coarse grid, then refines each curve's knee; returns the list of KneeSearch'''
+    check_metric(metric)
+    searches = {}
+    pending = []
+    for params in runs:
+        key = _group_key(params, axis)
+        search = searches.setdefault(key, KneeSearch(key))
+        if params['rngRun'] not in search.seeds:
+            search.seeds.append(params['rngRun'])
+        pending.append((search, params))
+
+    for n_round in range(max_rounds + 1):
+        for search, params in pending:
+            submit_cached(executor, program, outputs, cache, params)
+        executor.run()
+        for search, params in pending:
+            search.add(params[axis], read_metric(outputs.output_path(params), metric))
+
+        pending = []
+        for search in searches.values():
+            if search.converged:
+                continue
+            search.update(fraction, tolerance)
+            if search.converged or n_round == max_rounds:
+                continue
+            for load in search.refine(points):
+                for seed in search.seeds:
+                    pending.append((search, dict(search.group, **{axis: load, 'rngRun': seed})))
+        if not pending:
+            break
+        print(f'Refining {len({id(search) for search, _ in pending})} knees, {len(pending)} new runs')
+
+    for search in searches.values():
+        if not search.converged and search.lo is not None:
+            search.note = f'bracket wider than tolerance after {max_rounds} rounds'
+    return list(searches.values())
+
+
+def write_saturation(searches, axis, filename):
+    '''Writes one CSV row per curve: its parameters, the estimate and the final bracket'''
+    names = list(searches[0].group) if searches else []
+    lines = [','.join(names + [axis, 'lo', 'hi', 'note'])]
+    for search in searches:
+        values = [str(search.group[name]) for name in names]
+        values += [str(search.estimate), str(search.lo), str(search.hi), search.note]
+        lines.append(','.join(values))
+    atomic_write(filename, '\n'.join(lines) + '\n')
+    for line in lines:
+        print(line)
+    print(f'Saturation points written to {os.path.basename(filename)}')
@@ -0,0 +1,353 @@
+"""
+Sweep agents: run sweep jobs on other hosts (or in local stand-in processes).
+
+An agent executes the commands a SweepExecutor sends it, one at a time per connection,
+and answers with the exit code. The protocol is one JSON object per line in each
+direction, over an SSH session (the agent runs with --stdio on the remote host), a TCP
+socket (an agent started with --listen), or the pipes of a local agent process:
+
+    -> {"cmd": ..., "cwd": ..., "env": {...}, "timeout": ..., "log": ..., "files": [...], "send_files": false}
+    <- {"returncode": 0, "status": "done", "files": {path: base64}}
+
+Every host needs the same ns-3 checkout, configured and built, at the same path as the
+coordinating machine (a shared home directory or a synced copy), since the commands
+name the binary and the results directory by absolute path. Result files are copied
+back with rsync from SSH hosts and inside the protocol from TCP agents; local agents
+share the file system. When a host drops out, its job is rescheduled on the others.
+
+Hosts are listed in EXPERIMENTS_HOSTS (or SweepExecutor(hosts=...)), comma separated,
+each with an optional number of slots:
+
+    EXPERIMENTS_HOSTS=local*4                   # four local agent processes, for testing
+    EXPERIMENTS_HOSTS=ssh:node1*8,ssh:node2*8   # two machines over SSH, eight jobs each
+    EXPERIMENTS_HOSTS=tcp:node3:7000*4          # python -m utils.agent --listen 0.0.0.0:7000 on node3
+
+The lab drivers run unchanged; their SweepExecutor dispatches to the hosts.
+
+An agent runs whatever shell command it is sent. --listen therefore binds to 127.0.0.1
+unless given another address, and only serves connections that first send the shared
+token in EXPERIMENTS_AGENT_TOKEN (set to the same value on the agent and the
+coordinator). The connection itself is not encrypted; across untrusted networks use
+ssh: hosts.
+
+Usage (agent side):
+    python -m utils.agent --stdio
+    EXPERIMENTS_AGENT_TOKEN=<secret> python -m utils.agent --listen 0.0.0.0:7000
+"""
+
+import argparse
+import base64
+import hmac
+import json
+import os
+import queue
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import threading
+
+EXPERIMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_HOSTS = os.environ.get('EXPERIMENTS_HOSTS')
+
+DEFAULT_PORT = 7000
+
+#Shared secret a TCP agent requires from every connection
+TOKEN_ENV = 'EXPERIMENTS_AGENT_TOKEN'
+
+#Seconds a new TCP connection has to send the token
+AUTH_TIMEOUT = 10
+
+#Seconds to wait after SIGTERM before a job's process group is killed
+KILL_GRACE_PERIOD = 5
+
+
+class AgentLost(Exception):
+    '''The connection to an agent broke; its job has to run elsewhere'''
+
+
+#Agent side
+
+def _kill(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=KILL_GRACE_PERIOD)
+    except ProcessLookupError:
+        return
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def run_request(request, closed):
+    '''Runs one job request; returns the response. The job is killed if closed gets set.'''
+    env = dict(os.environ, **request.get('env', {}))
+    output = None
+    try:
+        for path in request.get('files', []) + ([request['log']] if request.get('log') else []):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        #stdout is the protocol channel in --stdio mode, job output goes to its log or stderr
+        output = open(request['log'], 'w') if request.get('log') else sys.stderr
+        proc = subprocess.Popen(request['cmd'], shell=True, cwd=request.get('cwd'), env=env,
+                                start_new_session=True, stdout=output, stderr=subprocess.STDOUT)
+    except OSError as e:
+        #Missing cwd, unwritable log directory: the job fails, the agent goes on
+        print(f'Could not start {request["cmd"]}: {e}', file=sys.stderr)
+        return {'returncode': 1, 'status': 'failed'}
+    finally:
+        if output is not None and output is not sys.stderr:
+            output.close()
+    timeout = request.get('timeout')
+    waited = 0
+    status = None
+    while status is None:
+        try:
+            returncode = proc.wait(timeout=1)
+            status = 'done' if returncode == 0 else 'failed'
+        except subprocess.TimeoutExpired:
+            waited += 1
+            if closed.is_set():
+                _kill(proc)
+                return None
+            if timeout is not None and waited >= timeout:
+                _kill(proc)
+                returncode = proc.wait()
+                status = 'timeout'
+    response = {'returncode': returncode, 'status': status}
+    if request.get('send_files'):
+        files = {}
+        for path in request.get('files', []) + ([request['log']] if request.get('log') else []):
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    files[path] = base64.b64encode(f.read()).decode()
+        response['files'] = files
+    return response
+
+
+def serve(reader, writer):
+    '''Answers job requests from one connection until it is closed'''
+    requests = queue.Queue()
+    closed = threading.Event()
+
+    #Reading in a thread notices a closed connection while a job is still running
+    def read():
+        for line in reader:
+            requests.put(json.loads(line))
+        closed.set()
+        requests.put(None)
+
+    threading.Thread(target=read, daemon=True).start()
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        response = run_request(request, closed)
+        if response is None:
+            return
+        writer.write((json.dumps(response) + '\n').encode())
+        writer.flush()
+
+
+def authenticate(conn, token):
+    '''Reads the first line of a TCP connection; True if it carries the token'''
+    conn.settimeout(AUTH_TIMEOUT)
+    stream = conn.makefile('rwb')
+    try:
+        hello = json.loads(stream.readline() or b'{}')
+    except (OSError, ValueError):
+        return None
+    conn.settimeout(None)
+    if not hmac.compare_digest(str(hello.get('token', '')).encode(), token.encode()):
+        return None
+    return stream
+
+
+def serve_tcp(conn, peer, token):
+    stream = authenticate(conn, token)
+    if stream is None:
+        print(f'Rejected connection from {peer[0]}: wrong or missing token', file=sys.stderr)
+        conn.close()
+        return
+    with conn:
+        serve(stream, stream)
+
+
+def listen(address):
+    token = os.environ.get(TOKEN_ENV)
+    if not token:
+        sys.exit(f'--listen runs commands for anyone who connects, set {TOKEN_ENV} to a shared secret')
+    host, _, port = address.rpartition(':')
+    server = socket.create_server((host or '127.0.0.1', int(port or DEFAULT_PORT)), reuse_port=False)
+    print(f'Agent listening on {server.getsockname()[0]}:{server.getsockname()[1]}', file=sys.stderr)
+    while True:
+        conn, peer = server.accept()
+        threading.Thread(target=serve_tcp, args=(conn, peer, token), daemon=True).start()
+
+
+#Coordinator side
+
+def parse_hosts(text):
+    '''EXPERIMENTS_HOSTS -> list of (kind, host, port, slots)'''
+    hosts = []
+    for entry in filter(None, (entry.strip() for entry in text.split(','))):
+        entry, _, slots = entry.partition('*')
+        kind, _, address = entry.partition(':')
+        if kind not in ('local', 'ssh', 'tcp'):
+            raise ValueError(f'Unknown host {entry!r}, expected local, ssh:<host> or tcp:<host>:<port>')
+        host, _, port = address.partition(':')
+        hosts.append((kind, host or None, int(port) if port else DEFAULT_PORT, int(slots or 1)))
+    return hosts
+
+
+class AgentConnection:
+    '''One slot on a host: a connection that runs one job at a time'''
+
+    def __init__(self, kind, host, port):
+        self.kind = kind
+        self.host = host
+        self.name = f'{kind}:{host}' if host else kind
+        self.proc = None
+        self.sock = None
+        if kind == 'tcp':
+            token = os.environ.get(TOKEN_ENV)
+            if not token:
+                raise RuntimeError(f'tcp:{host} needs the agent token in {TOKEN_ENV}')
+            self.sock = socket.create_connection((host, port))
+            self.reader = self.writer = self.sock.makefile('rwb')
+            self.writer.write((json.dumps({'token': token}) + '\n').encode())
+            self.writer.flush()
+            return
+        if kind == 'local':
+            cmd = [sys.executable, '-m', 'utils.agent', '--stdio']
+        else:
+            agent = f'cd {shlex.quote(EXPERIMENTS_DIR)} && python3 -m utils.agent --stdio'
+            cmd = ['ssh', '-o', 'BatchMode=yes', host, agent]
+        self.proc = subprocess.Popen(cmd, cwd=EXPERIMENTS_DIR, stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE)
+        self.reader, self.writer = self.proc.stdout, self.proc.stdin
+
+    def run(self, job, files):
+        '''Runs the job on the agent; returns (status, returncode)'''
+        env = {key: value for key, value in (job.env or {}).items() if os.environ.get(key) != value}
+        #Paths are the same on every host, so is the working directory
+        request = {'cmd': job.cmd, 'cwd': job.cwd or os.getcwd(), 'env': env, 'timeout': job.timeout,
+                   'log': job.log, 'files': files, 'send_files': self.kind == 'tcp'}
+        try:
+            self.writer.write((json.dumps(request) + '\n').encode())
+            self.writer.flush()
+            line = self.reader.readline()
+            if not line:
+                raise AgentLost(f'{self.name} closed the connection')
+            response = json.loads(line)
+            if not isinstance(response, dict) or not isinstance(response.get('files', {}), dict):
+                raise ValueError(f'unexpected response {line[:80]!r}')
+            status, returncode = response['status'], response['returncode']
+            #Only the files this job asked for, whatever else the agent sends
+            wanted = set(files) | ({job.log} if job.log else set())
+            received = {path: base64.b64decode(data)
+                        for path, data in response.get('files', {}).items() if path in wanted}
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            raise AgentLost(f'{self.name}: {e}')
+        for path, data in received.items():
+            with open(path, 'wb') as f:
+                f.write(data)
+        if self.kind == 'ssh':
+            for path in files + ([job.log] if job.log else []):
+                subprocess.run(['rsync', '-a', f'{self.host}:{path}', path],
+                               stderr=subprocess.DEVNULL)
+        return status, returncode
+
+    def close(self):
+        '''Closing the connection makes the agent kill its running job'''
+        for stream in (self.writer, self.reader):
+            try:
+                stream.close()
+            except (OSError, ValueError):
+                pass
+        if self.sock is not None:
+            self.sock.close()
+        if self.proc is not None:
+            try:
+                self.proc.wait(timeout=KILL_GRACE_PERIOD + 1)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class AgentPool:
+    '''Connections to every slot of every host; jobs go to whichever slot is idle'''
+
+    def __init__(self, hosts):
+        self.hosts = parse_hosts(hosts) if isinstance(hosts, str) else hosts
+        self.slots = sum(slots for *_, slots in self.hosts)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._alive = 0
+        self._connections = []
+
+    def start(self):
+        #A pool is started once per SweepExecutor.run(), after close() emptied it
+        self._idle = queue.Queue()
+        self._connections = []
+        for kind, host, port, slots in self.hosts:
+            for _ in range(slots):
+                try:
+                    connection = AgentConnection(kind, host, port)
+                except OSError as e:
+                    print(f'Could not reach agent {kind}:{host}: {e}')
+                    continue
+                self._connections.append(connection)
+                self._idle.put(connection)
+        self._alive = len(self._connections)
+        if not self._alive:
+            raise RuntimeError(f'None of the hosts {self.hosts} could be reached')
+
+    def run(self, job, files=()):
+        '''Runs the job on an idle slot; when a host drops out the job moves to another'''
+        while True:
+            connection = self._idle.get()
+            if connection is None:
+                #close() was called, or every agent has been lost
+                self._idle.put(None)
+                raise AgentLost('no agents left')
+            try:
+                result = connection.run(job, list(files))
+            except AgentLost as e:
+                with self._lock:
+                    self._alive -= 1
+                    alive = self._alive
+                print(f'Lost agent ({e}), rescheduling {job.cmd} on the {alive} remaining slots')
+                connection.close()
+                if not alive:
+                    self._idle.put(None)
+                continue
+            self._idle.put(connection)
+            return result
+
+    def close(self):
+        self._idle.put(None)
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._alive = 0
+        for connection in connections:
+            connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep agent')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--stdio', action='store_true', help='serve one connection on stdin/stdout')
+    mode.add_argument('--listen', metavar='[HOST:]PORT',
+                      help=f'accept TCP connections (127.0.0.1 unless a host is given, needs {TOKEN_ENV})')
+    args = parser.parse_args()
+    if args.stdio:
+        serve(sys.stdin.buffer, sys.stdout.buffer)
+    else:
+        listen(args.listen)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Content-addressed cache of simulation results.
+
+A sweep point is identified by the program name, its full argument set (minus the
+run-specific --outputFile) and the code revision (Ns3Target.revision). When an identical
+point was already simulated, its summary rows are copied into the run's output file and
+the simulator is not started, so extending a lambda range or re-plotting only costs the
+new points.
+
+Usage:
+    cache = ResultCache()
+    for l in lambdas:
+        submit_cached(executor, program, outputs, cache, {'mldPerNodeLambda': l})
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+from utils.results import atomic_write
+
+#Shared between all drivers: experiments/results/cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'results', 'cache')
+
+
+def ensure_cache_dir(cache_dir=DEFAULT_CACHE_DIR):
+    '''Creates the cache directory, ignored by git'''
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        #Cached rows are reproducible, keep them out of git
+        with open(os.path.join(cache_dir, '.gitignore'), 'w') as f:
+            f.write('*\n')
+
+
+class ResultCache:
+    '''Maps (program, params, revision) to the summary rows that run produced'''
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        ensure_cache_dir(cache_dir)
+
+    @staticmethod
+    def key(program, params):
+        '''Hash identifying a run of the Ns3Target program with these parameters'''
+        encoded = json.dumps({'program': program.program, 'params': params,
+                              'revision': program.revision}, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, program, params, output):
+        '''Copies the cached result to output; returns False on a miss'''
+        entry = self._entry(self.key(program, params)) + '.dat'
+        if not os.path.exists(entry):
+            self.misses += 1
+            return False
+        shutil.copyfile(entry, output)
+        self.hits += 1
+        return True
+
+    def store(self, program, params, output):
+        '''Adds the result in output to the cache (empty or missing outputs are skipped)'''
+        if not os.path.exists(output) or os.path.getsize(output) == 0:
+            return
+        key = self.key(program, params)
+        entry = self._entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        with open(output) as f:
+            atomic_write(entry + '.dat', f.read())
+        atomic_write(entry + '.json', json.dumps({'program': program.program, 'params': params,
+                                                  'revision': program.revision}, default=str))
+
+
+def submit_cached(executor, program, outputs, cache, params, callback=None, **kwargs):
+    '''Submits one sweep point unless it is already done or the cache holds its result.
+
+    Returns the Job, or None when the output file is already there. Run states are
+    journaled in outputs, and finished runs are added to the cache before callback (if
+    any) is called with the job.
+    '''
+    output = outputs.path(params)
+    if outputs.done(params):
+        #Finished in an earlier, interrupted pass over the same results directory
+        print(f'Done: {program.program} {params}')
+        return None
+    if cache.fetch(program, params, output):
+        outputs.finished(params, 'done')
+        print(f'Cached: {program.program} {params}')
+        return None
+    if os.path.exists(output):
+        #Left by a failed or killed attempt; the programs append, so start from scratch
+        os.remove(output)
+
+    def started(job):
+        outputs.started(params)
+
+    def store(job):
+        outputs.finished(params, job.status, job.returncode)
+        if job.status == 'done':
+            cache.store(program, params, output)
+        if callback is not None:
+            callback(job)
+
+    command = program.command(dict(params, outputFile=output))
+    return executor.submit(command, env=program.env, callback=store, on_start=started,
+                           memory_key=program.program, runtime_key=program.program,
+                           log=outputs.log_path(params), params=params, files=[output],
+                           **kwargs)
@@ -0,0 +1,183 @@
+"""
+SQLite catalog of every summary row under the results trees, across runs.
+
+Finding "all runs with nMldSta=20 and mcs=6" meant hard-coding timestamped directories
+and np.loadtxt-ing each one. update_catalog() indexes every published
+wifi-mld.dat/wifi-dcf.dat under experiments/results and the drivers' own results
+directories into one SQLite database (results/cache/catalog.db): one table per summary
+schema with named columns, plus the file and byte offset each row came from. Updates are
+incremental: only data files whose size or mtime changed are re-read, and files that
+disappeared are dropped.
+
+Usage:
+    python -m utils.catalog                 # update, then list the indexed experiments
+    python -m utils.catalog "SELECT file, offset, mldThptTotal FROM wifi_mld WHERE nMldSta=20 AND mcs=6"
+
+    db = connect()
+    update_catalog(db)
+    rows = find(db, 'wifi_mld', nMldSta=20, mcs=6)
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+from utils.cache import DEFAULT_CACHE_DIR, ensure_cache_dir
+from utils.results import PARTIAL_PREFIX
+from utils.store import WIFI_FINAL_COLUMNS, WIFI_MLD_COLUMNS, WIFI_SLD_COLUMNS, read_records
+
+EXPERIMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CATALOG = os.path.join(DEFAULT_CACHE_DIR, 'catalog.db')
+
+#Table per summary schema
+TABLES = {'wifi_mld': WIFI_MLD_COLUMNS, 'wifi_sld': WIFI_SLD_COLUMNS, 'wifi_final': WIFI_FINAL_COLUMNS}
+
+#Data files the examples write
+DATA_FILES = ('wifi-mld.dat', 'wifi-dcf.dat')
+
+#Parameters queries usually filter on, indexed in every table that has them
+INDEXED_PARAMS = ('nMldSta', 'nSld', 'mcs', 'channelWidth', 'payloadSize', 'rngRun',
+                  'mldPerNodeLambda', 'perSldLambda')
+
+
+def results_roots(experiments_dir=EXPERIMENTS_DIR):
+    '''experiments/results plus the results directory of every driver subdirectory'''
+    roots = [os.path.join(experiments_dir, 'results')]
+    for name in sorted(os.listdir(experiments_dir)):
+        path = os.path.join(experiments_dir, name, 'results')
+        if os.path.isdir(path):
+            roots.append(path)
+    return [root for root in roots if os.path.isdir(root)]
+
+
+def find_data_files(roots):
+    '''Published merged data files (no partial directories, per-run files or the cache)'''
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames
+                           if not d.startswith(PARTIAL_PREFIX) and d not in ('runs', 'cache')]
+            for filename in filenames:
+                if filename in DATA_FILES:
+                    yield os.path.join(dirpath, filename)
+
+
+def connect(filename=DEFAULT_CATALOG):
+    '''Opens (and creates) the catalog database'''
+    ensure_cache_dir(os.path.dirname(filename))
+    db = sqlite3.connect(filename)
+    with db:
+        db.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, experiment TEXT, '
+                   'tbl TEXT, size INTEGER, mtime REAL, rows INTEGER, indexed_at REAL)')
+        for table, columns in TABLES.items():
+            names = ', '.join(f'"{name}" REAL' for name in columns)
+            db.execute(f'CREATE TABLE IF NOT EXISTS {table} (file TEXT, offset INTEGER, '
+                       f'experiment TEXT, {names})')
+            db.execute(f'CREATE INDEX IF NOT EXISTS {table}_file ON {table} (file)')
+            for name in INDEXED_PARAMS:
+                if name in columns:
+                    db.execute(f'CREATE INDEX IF NOT EXISTS {table}_{name} ON {table} ("{name}")')
+    return db
+
+
+def read_offsets(dat_file):
+    '''Summary rows of a data file as (byte offset, values), and the table they belong to.
+
+    Same row selection as utils.store.read_rows: the widest rows of a known schema, or
+    the self-describing records (csv-header, json) by column name.
+    '''
+    records = read_records(dat_file)
+    if records:
+        names = set(records[0][1])
+        for table, columns in TABLES.items():
+            if set(columns) == names:
+                return [(offset, [record[name] for name in columns])
+                        for offset, record in records if set(record) == names], table
+        raise ValueError(f'{dat_file} has records with columns of no known schema')
+    widths = {len(columns): table for table, columns in TABLES.items()}
+    rows = []
+    offset = 0
+    with open(dat_file, 'rb') as f:
+        for line in f:
+            fields = line.decode(errors='replace').strip().split(',')
+            if len(fields) in widths:
+                rows.append((offset, fields))
+            offset += len(line)
+    if not rows:
+        raise ValueError(f'{dat_file} has no rows of a known schema')
+    width = max(len(fields) for _, fields in rows)
+    return [(offset, [float(value) for value in fields])
+            for offset, fields in rows if len(fields) == width], widths[width]
+
+
+def _drop(db, path):
+    for table in TABLES:
+        db.execute(f'DELETE FROM {table} WHERE file = ?', (path,))
+    db.execute('DELETE FROM files WHERE path = ?', (path,))
+
+
+def update_catalog(db, experiments_dir=EXPERIMENTS_DIR):
+    '''Indexes new and changed data files, drops deleted ones; returns (added, removed)'''
+    roots = results_roots(experiments_dir)
+    known = dict((path, (size, mtime)) for path, size, mtime in
+                 db.execute('SELECT path, size, mtime FROM files'))
+    seen = set()
+    added = 0
+    for path in find_data_files(roots):
+        rel = os.path.relpath(path, experiments_dir)
+        seen.add(rel)
+        stat = os.stat(path)
+        if known.get(rel) == (stat.st_size, stat.st_mtime):
+            continue
+        experiment = os.path.dirname(rel)
+        try:
+            rows, table = read_offsets(path)
+        except ValueError as e:
+            #Recorded without rows, so older formats are not re-read on every update
+            print(f'Skipping {rel}: {e}')
+            rows, table = [], None
+        with db:
+            _drop(db, rel)
+            if table:
+                marks = ', '.join('?' * (len(TABLES[table]) + 3))
+                db.executemany(f'INSERT INTO {table} VALUES ({marks})',
+                               [[rel, offset, experiment] + row for offset, row in rows])
+            db.execute('INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (rel, experiment, table, stat.st_size, stat.st_mtime, len(rows), time.time()))
+        added += 1
+    removed = [path for path in known if path not in seen]
+    with db:
+        for path in removed:
+            _drop(db, path)
+    return added, len(removed)
+
+
+def find(db, table, **params):
+    '''Rows of a catalog table whose columns equal the given values, as dicts'''
+    unknown = [name for name in params if name not in TABLES[table]]
+    if unknown:
+        raise KeyError(f'{unknown} are not columns of {table}')
+    where = ' AND '.join(f'"{name}" = ?' for name in params) or '1'
+    cursor = db.execute(f'SELECT * FROM {table} WHERE {where}', list(params.values()))
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor]
+
+
+def main(argv):
+    db = connect()
+    added, removed = update_catalog(db)
+    print(f'Catalog {DEFAULT_CATALOG}: {added} files indexed, {removed} removed')
+    if len(argv) > 1:
+        cursor = db.execute(argv[1])
+        if cursor.description:
+            print(','.join(column[0] for column in cursor.description))
+        for row in cursor:
+            print(','.join(str(value) for value in row))
+    else:
+        for experiment, table, rows in db.execute('SELECT experiment, tbl, rows FROM files ORDER BY experiment'):
+            print(f'{experiment}: {rows} rows in {table}')
+    db.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
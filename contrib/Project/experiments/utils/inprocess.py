@@ -0,0 +1,299 @@
+"""
+In-process sweep backend: run many short points of one ns-3 program per worker process.
+
+For tiny runs (link-performance with 1000 packets) most of the wall time goes to
+starting a process, loading the ns-3 libraries and the ./ns3 driver, not to simulating.
+An InProcessPool starts a few long-lived Python workers instead. Each one imports the
+ns-3 Python bindings once, has cppyy compile the program's .cc with its main() renamed,
+and then runs the parameter sets it is sent over its stdin, one after another:
+
+    -> {"args": ["--distance=25", ...], "cwd": ..., "log": ...}
+    <- {"returncode": 0}
+
+After every run the worker calls Simulator::Destroy(), Config::Reset() and
+RngSeedManager::ResetNextStreamIndex(), so the next run starts from the same defaults,
+seeds and stream numbers as a fresh process. A program's own globals are not reset; the
+program has to initialize them in main() (link-performance does). A run that crashes or
+calls exit() takes its worker down; the run is reported failed and a new worker is
+started for the next one.
+
+This needs ns-3 configured with --enable-python-bindings (and cppyy installed).
+run_points() uses a pool when it can and otherwise runs every point as its own
+process through a SweepExecutor.
+
+Usage:
+    with InProcessPool('link-performance', max_workers=4) as pool:
+        futures = [pool.submit({'distance': d}, cwd=f'runs/{d}') for d in distances]
+        codes = [future.result() for future in futures]
+
+    codes = run_points('link-performance', [({'distance': d}, f'runs/{d}') for d in distances])
+"""
+
+import importlib.util
+import json
+import os
+import queue
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ns3_target import Ns3Target, format_args
+from utils.sweep import SweepExecutor, default_workers
+
+EXPERIMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#Runs <name>_main (the program's renamed main) and resets ns-3's global state afterwards
+RUN_WRAPPER = '''
+int
+{name}_run(const std::vector<std::string>& args)
+{{
+    std::vector<char*> argv;
+    for (const auto& arg : args)
+    {{
+        argv.push_back(const_cast<char*>(arg.c_str()));
+    }}
+    argv.push_back(nullptr);
+    int code = {name}_main(static_cast<int>(args.size()), argv.data());
+    ns3::Simulator::Destroy();
+    ns3::Config::Reset();
+    ns3::RngSeedManager::ResetNextStreamIndex();
+    std::cout.flush();
+    std::cerr.flush();
+    return code;
+}}
+'''
+
+
+#Worker side
+
+def load_program(source):
+    '''Compiles a program's .cc into this process; returns its run(args) function'''
+    #cppyy compiles unoptimized unless told otherwise; must be set before it is imported
+    os.environ.setdefault('EXTRA_CLING_ARGS', '-O2')
+    #Loads every ns-3 library and its headers
+    from ns import ns  # noqa: F401
+    import cppyy
+    name = re.sub(r'\W', '_', os.path.splitext(os.path.basename(source))[0])
+    cppyy.cppdef(f'#define main {name}_main\n#include "{source}"\n#undef main\n'
+                 + RUN_WRAPPER.format(name=name))
+    return getattr(cppyy.gbl, f'{name}_run')
+
+
+def run_request(run, program, request):
+    '''Runs one parameter set; the program's output goes to the request's log'''
+    if request.get('cwd'):
+        os.makedirs(request['cwd'], exist_ok=True)
+        os.chdir(request['cwd'])
+    saved = None
+    if request.get('log'):
+        os.makedirs(os.path.dirname(os.path.abspath(request['log'])), exist_ok=True)
+        log = os.open(request['log'], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        saved = (os.dup(1), os.dup(2))
+        os.dup2(log, 1)
+        os.dup2(log, 2)
+        os.close(log)
+    try:
+        return int(run([program] + request['args']))
+    except Exception:
+        #C++ exceptions come through cppyy as Python ones
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stderr.flush()
+        if saved:
+            for fd, old in zip((1, 2), saved):
+                os.dup2(old, fd)
+                os.close(old)
+
+
+def worker(source):
+    '''Serves parameter sets from stdin until it is closed'''
+    #The protocol gets its own copy of stdout; what the program prints goes to stderr or a log
+    protocol = os.fdopen(os.dup(1), 'w')
+    os.dup2(2, 1)
+    run = load_program(source)
+    program = os.path.splitext(os.path.basename(source))[0]
+    protocol.write(json.dumps({'ready': True}) + '\n')
+    protocol.flush()
+    for line in sys.stdin:
+        returncode = run_request(run, program, json.loads(line))
+        protocol.write(json.dumps({'returncode': returncode}) + '\n')
+        protocol.flush()
+
+
+#Coordinator side
+
+class InProcessUnavailable(RuntimeError):
+    '''The program can't be run in-process here (no Python bindings, cppyy or source)'''
+
+
+class InProcessWorker:
+    '''One worker process with the program loaded'''
+
+    def __init__(self, source, env):
+        self.proc = subprocess.Popen([sys.executable, '-m', 'utils.inprocess', source], cwd=EXPERIMENTS_DIR,
+                                     env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        if not self.proc.stdout.readline():
+            code = self.proc.wait()
+            raise InProcessUnavailable(f'In-process worker could not load {source} (exit code {code})')
+
+    def run(self, args, cwd=None, log=None):
+        '''Runs one parameter set; returns (returncode, whether the worker is still usable)'''
+        request = {'args': args, 'cwd': os.path.abspath(cwd or os.getcwd()),
+                   'log': os.path.abspath(log) if log else None}
+        try:
+            self.proc.stdin.write((json.dumps(request) + '\n').encode())
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+        except OSError:
+            line = b''
+        if not line:
+            #Crashed (NS_FATAL_ERROR, a signal) or exited; the exit code stands for the run's
+            return self.proc.wait(), False
+        return json.loads(line)['returncode'], True
+
+    def close(self):
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+class InProcessPool:
+    '''Long-lived workers that run parameter sets of one program without a process per run'''
+
+    def __init__(self, program, max_workers=None, build=True):
+        target = program if isinstance(program, Ns3Target) else Ns3Target(program, build=build)
+        self.source = target.source
+        if self.source is None:
+            raise InProcessUnavailable(f'No .cc file found for {target.program}, it can only run as a binary')
+        if not os.path.isdir(os.path.join(target.driver.out_dir, 'bindings', 'python', 'ns')):
+            raise InProcessUnavailable('ns-3 Python bindings are not built '
+                                       '(./ns3 configure --enable-python-bindings)')
+        if importlib.util.find_spec('cppyy') is None:
+            raise InProcessUnavailable('cppyy is not installed')
+        self.env = target.env
+        self.max_workers = max_workers or default_workers()
+        self._executor = ThreadPoolExecutor(self.max_workers)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        #Set when a worker could not load the program, so the other runs fail right away
+        self._load_error = None
+
+    def _get_worker(self):
+        #Workers are started on demand, so a pool with more slots than runs starts no extra ones
+        while True:
+            with self._lock:
+                if self._load_error is not None:
+                    raise self._load_error
+                start = self._idle.empty() and len(self._workers) < self.max_workers
+                if start:
+                    self._workers.append(None)
+            if start:
+                break
+            worker = self._idle.get()
+            #None wakes a waiting run up after a worker died, to start its replacement
+            if worker is not None:
+                return worker
+        try:
+            worker = InProcessWorker(self.source, self.env)
+        except Exception as e:
+            with self._lock:
+                self._workers.remove(None)
+                if isinstance(e, InProcessUnavailable):
+                    self._load_error = e
+            #Wakes the runs waiting for a worker, they fail with the same error
+            self._idle.put(None)
+            raise
+        with self._lock:
+            self._workers[self._workers.index(None)] = worker
+        return worker
+
+    def _run(self, args, cwd, log):
+        worker = self._get_worker()
+        returncode, usable = worker.run(args, cwd, log)
+        if usable:
+            self._idle.put(worker)
+        else:
+            print(f'In-process worker died running {args} (code {returncode}), starting a new one')
+            worker.close()
+            with self._lock:
+                self._workers.remove(worker)
+            self._idle.put(None)
+        return returncode
+
+    def submit(self, args, cwd=None, log=None):
+        '''Queues a run; returns a Future of its exit code.
+
+        args is a dict of program parameters or a command-line argument string. The run's
+        output files land in cwd (created if needed), its stdout and stderr in log.
+        '''
+        if isinstance(args, dict):
+            args = format_args(args)
+        return self._executor.submit(self._run, shlex.split(args), cwd, log)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            if worker is not None:
+                worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_points(program, points, max_workers=None):
+    '''Runs (params, cwd) points of one program; returns their exit codes.
+
+    The points run in an InProcessPool when the Python bindings allow it, otherwise (or
+    if the workers can't load the program) each one runs as its own process. Every point
+    writes its output files to its cwd and its log to <cwd>.log.
+    '''
+    target = program if isinstance(program, Ns3Target) else Ns3Target(program)
+    codes = [None] * len(points)
+    error = None
+    try:
+        with InProcessPool(target, max_workers) as pool:
+            futures = [pool.submit(params, cwd=cwd, log=cwd + '.log') for params, cwd in points]
+            for i, future in enumerate(futures):
+                try:
+                    codes[i] = future.result()
+                except InProcessUnavailable as e:
+                    error = e
+    except InProcessUnavailable as e:
+        error = e
+    if error is not None:
+        print(f'Cannot run {target.program} in-process ({error}), starting a process per point')
+
+    rest = [i for i, code in enumerate(codes) if code is None]
+    if rest:
+        executor = SweepExecutor(max_workers=max_workers)
+        jobs = {}
+        for i in rest:
+            params, cwd = points[i]
+            os.makedirs(cwd, exist_ok=True)
+            jobs[i] = executor.submit(target.command(params), cwd=cwd, env=target.env,
+                                     log=cwd + '.log')
+        executor.run()
+        for i, job in jobs.items():
+            codes[i] = job.returncode if job.returncode is not None else 1
+    return codes
+
+
+if __name__ == '__main__':
+    worker(sys.argv[1])
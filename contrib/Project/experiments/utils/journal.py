@@ -0,0 +1,89 @@
+"""
+Per-sweep journal of run states, so an interrupted sweep can be resumed.
+
+Every run of a results directory has a row in <dir>/journal.db (SQLite) that moves
+queued -> running -> done/failed/timeout/cancelled. Rerunning the same sweep into the
+same directory (run.py --resume) skips the runs that are already done and only starts
+the ones that never finished, failed or were killed together with the driver.
+
+Usage:
+    journal = SweepJournal(os.path.join(dir, 'journal.db'))
+    journal.queued(run_key(params), params)
+    if journal.status(run_key(params)) != 'done':
+        ...
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    returncode INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    start_time REAL,
+    end_time REAL
+)
+'''
+
+
+class SweepJournal:
+    '''Run states of one sweep, keyed by run_key(params) like the per-run output files'''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+        #Job callbacks update the journal from the executor's worker threads
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(SCHEMA)
+
+    def _execute(self, sql, args=()):
+        with self._lock, self._db:
+            return self._db.execute(sql, args).fetchall()
+
+    def queued(self, key, params):
+        '''Records a run; a run that is already done keeps its state'''
+        self._execute('INSERT INTO runs (key, params, status) VALUES (?, ?, ?) '
+                      "ON CONFLICT(key) DO UPDATE SET status = 'queued' WHERE status != 'done'",
+                      (key, json.dumps(params, default=str), 'queued'))
+
+    def started(self, key):
+        self._execute("UPDATE runs SET status = 'running', attempts = attempts + 1, "
+                      'start_time = ?, end_time = NULL WHERE key = ?', (time.time(), key))
+
+    def finished(self, key, status, returncode=None):
+        self._execute('UPDATE runs SET status = ?, returncode = ?, end_time = ? WHERE key = ?',
+                      (status, returncode, time.time(), key))
+
+    def status(self, key):
+        '''State of the run, or None if it was never queued'''
+        rows = self._execute('SELECT status FROM runs WHERE key = ?', (key,))
+        return rows[0][0] if rows else None
+
+    def counts(self):
+        '''{status: number of runs}'''
+        return dict(self._execute('SELECT status, COUNT(*) FROM runs GROUP BY status'))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def wall_times(filename):
+    '''[(params, seconds)] of the runs a journal records as done, read without locking it'''
+    try:
+        db = sqlite3.connect(f'file:{urllib.parse.quote(filename)}?mode=ro', uri=True)
+        try:
+            rows = db.execute("SELECT params, end_time - start_time FROM runs WHERE status = 'done' "
+                              'AND start_time IS NOT NULL AND end_time > start_time').fetchall()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return []
+    return [(json.loads(params), seconds) for params, seconds in rows]
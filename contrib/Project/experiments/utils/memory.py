@@ -0,0 +1,114 @@
+"""
+Peak memory sampling and a learned per-program memory model for admission control.
+
+SweepExecutor used to size its pool from a fixed guess (DEFAULT_JOB_MEMORY_MB per run).
+Small single-bss-sld runs need far less than that, large nMldSta runs far more. Here the
+resident size of every job's process group is sampled from /proc while it runs, the peak
+is recorded per program, and the executor only starts another job while the projected
+total of the running jobs stays under a fraction of the machine's free RAM.
+
+The model is kept in results/cache/memory-model.json so later sweeps start from what
+earlier ones measured.
+"""
+
+import json
+import os
+import threading
+
+from utils.cache import DEFAULT_CACHE_DIR, ensure_cache_dir
+from utils.results import atomic_write
+
+#Rough resident size of one single-bss-mld run, used until a program has been measured
+DEFAULT_JOB_MEMORY_MB = 512
+
+#Estimates are the largest peak seen so far plus this much headroom
+HEADROOM = 1.25
+
+DEFAULT_MODEL_FILE = os.path.join(DEFAULT_CACHE_DIR, 'memory-model.json')
+
+
+def available_memory_mb():
+    '''Returns MemAvailable from /proc/meminfo in MB, or None if it can't be read'''
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def _process_memory_kb(pid):
+    '''Peak (VmHWM) or current (VmRSS) resident size of one process in kB'''
+    rss = 0
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return rss
+
+
+def process_group_memory_mb(pgid):
+    '''Sum of the resident peaks of every process in the process group, in MB.
+
+    Jobs run in their own session, so the group holds the shell and the simulator.
+    Returns None where /proc is not available.
+    '''
+    try:
+        pids = [name for name in os.listdir('/proc') if name.isdigit()]
+    except OSError:
+        return None
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        #Fields after the command name: state ppid pgrp ...
+        fields = stat[stat.rfind(')') + 2:].split()
+        if len(fields) > 2 and int(fields[2]) == pgid:
+            total_kb += _process_memory_kb(pid)
+    return total_kb / 1024
+
+
+class MemoryModel:
+    '''Peak memory per program (or any job key), learned from finished jobs'''
+
+    def __init__(self, filename=DEFAULT_MODEL_FILE, default_mb=DEFAULT_JOB_MEMORY_MB):
+        self.filename = filename
+        self.default_mb = default_mb
+        self._lock = threading.Lock()
+        self.peaks = {}
+        if filename and os.path.exists(filename):
+            try:
+                with open(filename) as f:
+                    self.peaks = json.load(f)
+            except (OSError, ValueError):
+                print(f'Ignoring unreadable memory model {filename}')
+
+    def estimate(self, key):
+        '''Memory in MB a job with this key is expected to need'''
+        with self._lock:
+            peak = self.peaks.get(key) if key is not None else None
+        return peak * HEADROOM if peak else self.default_mb
+
+    def record(self, key, peak_mb):
+        if key is None or not peak_mb:
+            return
+        with self._lock:
+            self.peaks[key] = max(self.peaks.get(key, 0), peak_mb)
+
+    def save(self):
+        if not self.filename:
+            return
+        with self._lock:
+            data = json.dumps(self.peaks, indent=2, sort_keys=True)
+        ensure_cache_dir(os.path.dirname(self.filename))
+        atomic_write(self.filename, data)
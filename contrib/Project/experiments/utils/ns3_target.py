@@ -0,0 +1,141 @@
+"""
+Build-once, exec-directly access to ns-3 programs for sweeps.
+
+`./ns3 run "prog --a=1"` re-reads .lock-ns3, rebuilds the shortcut map and runs
+`cmake --build --target prog` before it execs the binary, and it does so for every sweep
+point. Ns3Target does the resolution and build once, through the ns3 driver's own
+get_program_shortcuts/get_target_to_build/cmake_build helpers, and then hands out plain
+command lines for the built binary plus the environment run_step would have set.
+
+Usage:
+    program = Ns3Target('single-bss-mld')
+    executor.submit(program.command(f'--mldPerNodeLambda={l}'), env=program.env)
+"""
+
+import functools
+import hashlib
+import os
+import shlex
+import subprocess
+import sys
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+
+#Experiment scripts and results don't change simulator output, so they don't count as source changes
+EXPERIMENTS_PATHSPEC = ':(exclude)contrib/Project/experiments'
+
+#Top-level ns-3 directory (contrib/Project/experiments/utils -> ../../../..)
+NS3_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..'))
+
+
+def load_ns3_driver(ns3_path=NS3_PATH):
+    '''Imports the ./ns3 driver script as a module without running its main()'''
+    driver_file = os.path.join(ns3_path, 'ns3')
+    loader = SourceFileLoader('ns3_driver', driver_file)
+    spec = spec_from_loader('ns3_driver', loader)
+    driver = module_from_spec(spec)
+    loader.exec_module(driver)
+    return driver
+
+
+def format_args(params):
+    '''Turns {'nMldSta': 5, 'mldPerNodeLambda': 0.01} into "--nMldSta=5 --mldPerNodeLambda=0.01"'''
+    return ' '.join(f'--{name}={shlex.quote(str(value))}' for name, value in params.items())
+
+
+class Ns3Target:
+    '''A runnable ns-3 program resolved from a ./ns3 shortcut and built once'''
+
+    def __init__(self, program, ns3_path=NS3_PATH, build=True, jobs=None):
+        self.program = program
+        self.ns3_path = ns3_path
+        self.driver = load_ns3_driver(ns3_path)
+        driver = self.driver
+
+        if not os.path.exists(driver.lock_file):
+            raise RuntimeError(f'{driver.lock_file} not found, run ./ns3 configure first')
+        #Same as the driver's main(): the lock file sets out_dir and the program lists
+        with open(driver.lock_file) as f:
+            exec(f.read(), vars(driver))
+        build_info, _ = driver.check_lock_data(driver.out_dir)
+        self.build_profile = build_info['BUILD_PROFILE']
+        self.ns3_version = build_info['VERSION']
+
+        programs = driver.get_program_shortcuts(self.build_profile, self.ns3_version)
+        if program not in programs:
+            raise RuntimeError(f"Couldn't find the specified program: {program}")
+        if len(programs[program]) > 1:
+            raise RuntimeError(f'Program "{program}" is ambiguous, try one of: {programs[program]}')
+        self.path = programs[program][0]
+        self.cmake_target = driver.get_target_to_build(self.path, self.ns3_version, self.build_profile)
+
+        libdir = os.path.join(driver.out_dir, 'lib')
+        self.env = os.environ.copy()
+        for key, value in (('PATH', libdir),
+                           ('PYTHONPATH', os.path.join(driver.out_dir, 'bindings', 'python')),
+                           ('LD_LIBRARY_PATH', libdir)):
+            if key == 'LD_LIBRARY_PATH' and sys.platform == 'win32':
+                continue
+            self.env[key] = self.env[key] + driver.path_sep + value if key in self.env else value
+
+        if build:
+            self.build(jobs)
+
+    def build(self, jobs=None):
+        '''Builds the program's CMake target (a no-op build when it is up to date)'''
+        driver = self.driver
+        cache_folder, _ = driver.search_cmake_cache(self.build_profile)
+        if not driver.project_configured(cache_folder):
+            raise RuntimeError('ns-3 is not configured, run ./ns3 configure first')
+        print(f'Building {self.cmake_target} once for the sweep')
+        try:
+            #Skipped when no source changed since the last build, serialized with ./ns3 run's builds
+            driver.cmake_build_if_changed(cache_folder, output=None, jobs=jobs or driver.max_cpu_threads,
+                                          target=self.cmake_target, program=self.path, build_verbose=False)
+        except SystemExit as e:
+            raise RuntimeError(f'Building {self.cmake_target} failed with code {e.code}') from None
+        if not os.path.exists(self.path):
+            raise RuntimeError(f'Executable has not been built: {self.path}')
+
+    @property
+    def source(self):
+        '''The program's .cc file, found the way get_program_shortcuts does, or None'''
+        directory = os.path.relpath(os.path.dirname(self.path), self.driver.out_dir)
+        name = os.path.basename(self.path).replace('-' + self.build_profile, '')
+        name = name.replace('ns' + self.ns3_version + '-', '')
+        source = os.path.join(self.ns3_path, directory, name + '.cc')
+        return source if os.path.exists(source) else None
+
+    @functools.cached_property
+    def revision(self):
+        '''Identifies the code a result comes from.
+
+        Combines the git commit (what the drivers record in git-commit.txt), a digest of
+        uncommitted source changes (the libraries can change without the binary changing)
+        and a digest of the built binary.
+        '''
+        parts = []
+        try:
+            parts.append(subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=self.ns3_path,
+                                                 stderr=subprocess.DEVNULL).decode().strip())
+            diff = subprocess.check_output(['git', 'diff', 'HEAD', '--', '.', EXPERIMENTS_PATHSPEC],
+                                           cwd=self.ns3_path, stderr=subprocess.DEVNULL)
+            if diff:
+                parts.append('dirty-' + hashlib.sha1(diff).hexdigest()[:12])
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        digest = hashlib.sha1()
+        with open(self.path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        parts.append('bin-' + digest.hexdigest()[:12])
+        return '-'.join(parts)
+
+    def command(self, args=''):
+        '''Shell command line running the built binary.
+
+        args is either a ready argument string or a dict of program parameters.
+        '''
+        if isinstance(args, dict):
+            args = format_args(args)
+        return f'{shlex.quote(self.path)} {args}'.strip()
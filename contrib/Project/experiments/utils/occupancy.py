@@ -0,0 +1,161 @@
+"""
+Channel occupancy, collision and fairness analytics over PPDU tx timelines.
+
+The timelines CheckStats() writes (see utils/timeline.py) hold one record per receiver
+of every PPDU. Everything here works on whole NumPy arrays with sorted-interval sweeps,
+no Python loop over PPDUs, so 10^7 records take seconds:
+
+    transmissions()     one interval per PPDU (receiver copies dropped), per link
+    busy_intervals()    union of the transmissions: the channel's busy periods
+    overlap_intervals() periods where two or more transmissions overlap (collisions)
+    collided()          which transmissions overlap another one
+    airtime()           airtime per sender
+    inter_access_times() gaps between consecutive transmissions of each sender
+
+Usage:
+    tl = read_timeline('tx-timeline.bin')
+    for link, stats in analyze(tl).items():
+        print(link, stats['busy_fraction'], stats['collision_probability'])
+
+    python -m utils.occupancy tx-timeline.bin
+"""
+
+import sys
+
+import numpy as np
+
+from utils.timeline import read_timeline
+
+
+def transmissions(timeline, link=None):
+    '''(start, end, sender) arrays of the distinct PPDUs on a link (or all), sorted by start'''
+    if link is not None:
+        timeline = timeline[timeline['link'] == link]
+    start = np.asarray(timeline['start'])
+    end = np.asarray(timeline['end'])
+    sender = np.asarray(timeline['sender'])
+    order = np.lexsort((end, sender, start))
+    start, end, sender = start[order], end[order], sender[order]
+    #Every receiver logs the same PPDU; keep the first copy of each (start, sender, end)
+    keep = np.ones(len(start), dtype=bool)
+    keep[1:] = (start[1:] != start[:-1]) | (sender[1:] != sender[:-1]) | (end[1:] != end[:-1])
+    return start[keep], end[keep], sender[keep]
+
+
+def busy_intervals(start, end):
+    '''Union of [start, end) intervals sorted by start; returns (starts, ends) of the busy periods'''
+    if len(start) == 0:
+        return start[:0], end[:0]
+    reach = np.maximum.accumulate(end)
+    #A new busy period starts where an interval begins after everything before it has ended
+    new = np.ones(len(start), dtype=bool)
+    new[1:] = start[1:] > reach[:-1]
+    first = np.flatnonzero(new)
+    last = np.append(first[1:] - 1, len(start) - 1)
+    return start[first], reach[last]
+
+
+def overlap_intervals(start, end, depth=2):
+    '''Periods covered by at least depth intervals at once; returns (starts, ends)'''
+    times = np.concatenate([start, end])
+    steps = np.concatenate([np.ones(len(start), np.int64), -np.ones(len(end), np.int64)])
+    #Ends sort before starts at the same time, so back-to-back PPDUs don't count as overlapping
+    order = np.lexsort((steps, times))
+    times, steps = times[order], steps[order]
+    level = np.cumsum(steps)
+    above = level >= depth
+    was_above = np.concatenate([[False], above[:-1]])
+    begins = np.flatnonzero(above & ~was_above)
+    ends = np.flatnonzero(~above & was_above)
+    starts, stops = times[begins], times[ends]
+    keep = stops > starts
+    return starts[keep], stops[keep]
+
+
+def collided(start, end):
+    '''Boolean mask of the intervals (sorted by start) that overlap any other one'''
+    n = len(start)
+    mask = np.zeros(n, dtype=bool)
+    if n < 2:
+        return mask
+    #Overlaps an earlier interval: one of them is still running when this one starts
+    reach = np.maximum.accumulate(end)
+    mask[1:] |= start[1:] < reach[:-1]
+    #Overlaps a later one: the next start (the earliest later start) is before this end
+    mask[:-1] |= start[1:] < end[:-1]
+    return mask
+
+
+def airtime(start, end, sender):
+    '''(senders, airtime in ns of each) over the given transmissions'''
+    senders, index = np.unique(sender, return_inverse=True)
+    return senders, np.bincount(index, weights=(end - start).astype(float), minlength=len(senders))
+
+
+def inter_access_times(start, sender):
+    '''{sender: array of ns between the starts of its consecutive transmissions}'''
+    order = np.lexsort((start, sender))
+    start, sender = start[order], sender[order]
+    boundaries = np.flatnonzero(sender[1:] != sender[:-1]) + 1
+    gaps = np.diff(start)
+    #Drop the gaps that span two senders
+    valid = np.ones(len(gaps), dtype=bool)
+    valid[boundaries - 1] = False
+    senders = sender[np.append(0, boundaries)] if len(sender) else sender
+    per_sender = np.split(gaps[valid], boundaries - np.arange(1, len(boundaries) + 1))
+    return dict(zip(senders.tolist(), per_sender))
+
+
+def jain_index(values):
+    '''Jain's fairness index: 1 when every sender gets the same, 1/n when one gets everything'''
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0 or not values.any():
+        return float('nan')
+    return float(values.sum() ** 2 / (len(values) * (values ** 2).sum()))
+
+
+def channel_stats(start, end, sender, t0=None, t1=None):
+    '''Occupancy, collision and fairness statistics of one channel's transmissions'''
+    #Default to the span from the first start to the last end
+    if t0 is None:
+        t0 = int(start.min()) if len(start) else 0
+    if t1 is None:
+        t1 = int(end.max()) if len(end) else 0
+    span = max(int(t1 - t0), 1)
+    busy_start, busy_end = busy_intervals(start, end)
+    busy = float((busy_end - busy_start).sum())
+    overlap_start, overlap_end = overlap_intervals(start, end)
+    overlapped = float((overlap_end - overlap_start).sum())
+    senders, sender_airtime = airtime(start, end, sender)
+    gaps = inter_access_times(start, sender)
+    return {
+        'ppdus': len(start),
+        'span_ns': span,
+        'busy_fraction': busy / span,
+        'idle_fraction': 1 - busy / span,
+        'collision_time_fraction': overlapped / busy if busy else 0.0,
+        'collision_probability': float(collided(start, end).mean()) if len(start) else 0.0,
+        'overlaps': len(overlap_start),
+        'airtime': dict(zip(senders.tolist(), (sender_airtime / span).tolist())),
+        'airtime_fairness': jain_index(sender_airtime),
+        'mean_inter_access_ns': {s: float(g.mean()) if len(g) else float('nan') for s, g in gaps.items()},
+    }
+
+
+def analyze(timeline, t0=None, t1=None):
+    '''{link id: channel_stats} for every link in the timeline (links are separate channels)'''
+    links = np.unique(np.asarray(timeline['link']))
+    return {int(link): channel_stats(*transmissions(timeline, link), t0=t0, t1=t1) for link in links}
+
+
+def main(argv):
+    for filename in argv[1:]:
+        for link, stats in analyze(read_timeline(filename)).items():
+            print(f'{filename} link {link}: {stats["ppdus"]} PPDUs, busy {stats["busy_fraction"]:.3f}, '
+                  f'idle {stats["idle_fraction"]:.3f}, collisions {stats["collision_probability"]:.3f} '
+                  f'of PPDUs / {stats["collision_time_fraction"]:.3f} of busy time, '
+                  f'airtime fairness {stats["airtime_fairness"]:.3f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,162 @@
+"""
+Headless, parallel rendering of the lab figures from stored results.
+
+The Lab drivers drew every figure with interactive pyplot state (plt.figure() and never
+a close), so memory grew over a long session and, once the simulations came from the
+cache, rendering the 300 dpi PNGs one after the other dominated iteration time. Here a
+figure is a small table in the experiment's spec:
+
+    [[P1a.figures]]
+    file = "queueDelay_plot.png"
+    x = "mldPerNodeLambda"
+    xscale = "log"                      # optional, also yscale
+    xlabel = "Offered Load (Arrival Rate)"
+    ylabel = "Delay (us)"
+    title = "Queue Delays vs. Offered Load"
+    legend = "Lambda={perSldLambda}"    # optional legend title, formatted with the spec params
+    where = { nSld = 10 }               # optional row filter
+    group_by = "nMldSta"                # optional, one set of lines per value ({group} in labels)
+    lines = [
+        { y = "mldMeanQueDelayLink1", label = "Link I", color = "black" },
+        { y = "mldMeanE2eDelayLink1", normalize = true },   # divided by its maximum
+        { y = "sldSuccPr", complement = true },             # 1 - y
+    ]
+
+Columns are named as in utils/store.py. render_figures() draws figures with the Agg
+backend in a process pool. Every worker keeps the tables it has opened, so figures of
+the same results directory don't load the data again, and every figure is a standalone
+matplotlib Figure that is released as soon as it is saved, never registered with pyplot.
+
+Usage:
+    render_figures(figure_jobs(SPECS['P1a'], dir))
+    python -m utils.plotting specs/Lab1.toml specs/Lab2.toml    # redraw the latest results
+"""
+
+import functools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.store import ResultsTable, load_table
+
+EXPERIMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_DPI = 300
+
+
+def figure_jobs(spec, results_dir):
+    '''(results_dir, data file, figure, spec params) for every figure of a spec'''
+    return [(results_dir, spec['output'], figure, spec.get('params', {}))
+            for figure in spec.get('figures', [])]
+
+
+def _use_agg():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+@functools.lru_cache(maxsize=None)
+def _open_table(store_path):
+    '''Tables opened by this process, shared by all the figures drawn from them'''
+    return ResultsTable(store_path)
+
+
+def _line_data(table, x, line, rows):
+    xs = np.asarray(table[x])[rows]
+    ys = np.asarray(table[line['y']])[rows]
+    order = np.argsort(xs, kind='stable')
+    xs, ys = xs[order], ys[order]
+    if line.get('complement'):
+        ys = 1 - ys
+    if line.get('normalize') and len(ys) and np.max(ys) != 0:
+        ys = ys / np.max(ys)
+    return xs, ys
+
+
+def draw_figure(store_path, figure, params, output):
+    '''Draws one figure from a columnar table into output; returns output'''
+    from matplotlib import colormaps
+    from matplotlib.figure import Figure
+
+    table = _open_table(store_path)
+    rows = np.ones(len(table), dtype=bool)
+    for name, value in figure.get('where', {}).items():
+        rows &= np.asarray(table[name]) == value
+
+    fig = Figure()
+    try:
+        ax = fig.subplots()
+        group_by = figure.get('group_by')
+        groups = np.unique(np.asarray(table[group_by])[rows]) if group_by else [None]
+        colors = colormaps['plasma'](np.linspace(0, 1, len(groups))) if group_by else [None]
+        for group, color in zip(groups, colors):
+            subset = rows if group is None else rows & (np.asarray(table[group_by]) == group)
+            for line in figure['lines']:
+                xs, ys = _line_data(table, figure['x'], line, subset)
+                label = line.get('label', line['y']).format(group=group)
+                ax.plot(xs, ys, label=label, color=line.get('color', color))
+        if 'xscale' in figure:
+            ax.set_xscale(figure['xscale'])
+        if 'yscale' in figure:
+            ax.set_yscale(figure['yscale'])
+        ax.grid(figure.get('grid', False))
+        legend = figure.get('legend')
+        ax.legend(title=legend.format(**params) if legend else None)
+        ax.set_xlabel(figure.get('xlabel', figure['x']))
+        ax.set_ylabel(figure.get('ylabel', ''))
+        ax.set_title(figure.get('title', ''))
+        fig.savefig(output, format='png', dpi=figure.get('dpi', DEFAULT_DPI))
+    finally:
+        fig.clear()
+    return output
+
+
+def render_figures(jobs, max_workers=None):
+    '''Draws every (results_dir, data file, figure, params) job; returns the written paths'''
+    #Convert each data file once up front, so workers only ever read the columnar copies
+    tasks = []
+    for results_dir, filename, figure, params in jobs:
+        store_path = load_table(results_dir, filename).path
+        tasks.append((store_path, figure, params, os.path.join(results_dir, figure['file'])))
+    if not tasks:
+        return []
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        _use_agg()
+        return [draw_figure(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg) as pool:
+        return list(pool.map(draw_figure, *zip(*tasks)))
+
+
+def latest_results(parent, filename):
+    '''Newest published results directory under parent holding filename, or None'''
+    if not os.path.isdir(parent):
+        return None
+    for name in sorted(os.listdir(parent), reverse=True):
+        dir = os.path.join(parent, name)
+        #Timestamped directories only, not partial sweeps or scratch directories like run/
+        if name[:1].isdigit() and os.path.exists(os.path.join(dir, filename)):
+            return dir
+    return None
+
+
+def main(argv):
+    from utils.spec import load_spec
+
+    jobs = []
+    for spec_file in argv[1:]:
+        lab = os.path.splitext(os.path.basename(spec_file))[0]
+        for name, spec in load_spec(spec_file).items():
+            dir = latest_results(os.path.join(EXPERIMENTS_DIR, 'results', lab, name), spec['output'])
+            if spec.get('figures') and dir is None:
+                print(f'{lab} {name}: no results to plot')
+            elif dir is not None:
+                jobs += figure_jobs(spec, dir)
+    for path in render_figures(jobs):
+        print(f'Wrote {path}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,130 @@
+"""
+Live progress and ETA of a running sweep.
+
+SweepProgress watches a SweepExecutor from a background thread and keeps one status
+line up to date: jobs done/running/queued/failed, mean and longest wall time, and an
+ETA. On a terminal the line is redrawn in place, otherwise (output piped to a file) it
+is printed every LOG_INTERVAL seconds. Failures are reported on their own line with the
+job's log file as they happen.
+
+The ETA divides the work left by the sweep's throughput once a round of jobs has
+finished. Until then it is based on the runtimes predicted from earlier sweeps of the
+same program (utils/runtime.py).
+"""
+
+import sys
+import threading
+import time
+
+#Seconds between redraws on a terminal
+REFRESH_INTERVAL = 1.0
+
+#Seconds between status lines when the output is not a terminal
+LOG_INTERVAL = 60.0
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return '?'
+    if seconds < 10:
+        return f'{seconds:.1f}s'
+    seconds = int(seconds)
+    if seconds < 60:
+        return f'{seconds}s'
+    if seconds < 3600:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+
+
+class SweepProgress:
+    '''Status line of an executor's jobs, redrawn from a background thread'''
+
+    def __init__(self, executor, stream=None):
+        self.executor = executor
+        self.stream = stream or sys.stdout
+        self.interactive = self.stream.isatty()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_time = None
+        self._line = False
+
+    def start(self):
+        self._start_time = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        '''Stops the redraws and prints the final summary'''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._write(self.summary(final=True), newline=True)
+
+    def _loop(self):
+        interval = REFRESH_INTERVAL if self.interactive else LOG_INTERVAL
+        while not self._stop.wait(interval):
+            self._write(self.summary(), newline=not self.interactive)
+
+    def _write(self, text, newline):
+        with self._lock:
+            if self.interactive:
+                text = '\r\033[K' + text
+            self.stream.write(text + ('\n' if newline else ''))
+            self.stream.flush()
+            self._line = not newline
+
+    def message(self, text):
+        '''Prints a line without breaking the status line'''
+        with self._lock:
+            if self._line:
+                self.stream.write('\r\033[K')
+                self._line = False
+        self._write(text, newline=True)
+
+    def eta(self, jobs, now):
+        '''Seconds until the queue is drained, or None while nothing is known'''
+        finished = [job for job in jobs if job.status in ('done', 'failed', 'timeout')]
+        queued = [job for job in jobs if job.status == 'queued']
+        running = [job for job in jobs if job.status == 'running']
+        if not queued and not running:
+            return 0
+        workers = self.executor.max_workers
+        elapsed = now - self._start_time
+        if len(finished) >= workers and elapsed > 0:
+            #Observed throughput, which already accounts for the pool size and memory limits
+            return (len(queued) + len(running) / 2) * elapsed / len(finished)
+        model = self.executor.runtime_model
+        work = 0
+        for job in queued + running:
+            estimate = job.predicted_time or model.estimate(job.runtime_key)
+            if estimate is None:
+                return None
+            if job.status == 'running':
+                estimate = max(estimate - (now - job.start_time), 0)
+            work += estimate
+        return work / min(workers, len(queued) + len(running))
+
+    def summary(self, final=False):
+        now = time.time()
+        #Repeated run() calls (refinement rounds, replications) each get their own counts
+        jobs = self.executor.current_jobs()
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        failed = counts.get('failed', 0) + counts.get('timeout', 0)
+        walls = [job.wall_time for job in jobs if job.status == 'done']
+        mean = sum(walls) / len(walls) if walls else None
+        text = (f'{counts.get("done", 0)}/{len(jobs)} done, {counts.get("running", 0)} running, '
+                f'{counts.get("queued", 0)} queued, {failed} failed')
+        if final:
+            longest = max(walls) if walls else None
+            return (f'Sweep finished in {format_duration(now - self._start_time)}: {text} | '
+                    f'mean {format_duration(mean)}, longest {format_duration(longest)} per job')
+        running = [now - job.start_time for job in jobs if job.status == 'running' and job.start_time]
+        eta = self.eta(jobs, now)
+        finish = time.strftime(' (~%H:%M)', time.localtime(now + eta)) if eta is not None else ''
+        return (f'[{time.strftime("%H:%M:%S")}] {text} | mean {format_duration(mean)}/job, '
+                f'longest running {format_duration(max(running) if running else None)} | '
+                f'ETA {format_duration(eta)}{finish}')
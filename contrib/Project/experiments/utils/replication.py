@@ -0,0 +1,204 @@
+"""
+Independent replications (--rngRun seeds) per sweep point with confidence-interval stopping.
+
+One run per point gives no error bars and no idea whether the point is noisy. Here every
+point starts with min_runs seeds; whenever all of a point's runs have finished, the CI
+half-width of each chosen metric is compared with target * |mean| and, if any metric is
+still too wide, batch more seeds are queued for that point only (up to max_runs). New
+seeds are submitted from the job callbacks, so stable points stop early while noisy ones
+keep the workers busy. Spec options:
+
+    [P1a.replicate]
+    metrics = ["mldThptTotal", "mldMeanE2eDelayTotal"]     # summary columns, by name
+    target = 0.05           # CI half-width relative to the mean
+    confidence = 0.95
+    min_runs = 3
+    max_runs = 20
+    batch = 2               # seeds added per point when its CI is too wide
+"""
+
+import math
+import statistics
+import threading
+
+from utils.adaptive import check_metric, read_metric
+from utils.cache import submit_cached
+from utils.results import atomic_write
+
+try:
+    import scipy.stats as scipy_stats
+except ImportError:
+    scipy_stats = None
+
+DEFAULT_TARGET = 0.05
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MIN_RUNS = 3
+DEFAULT_MAX_RUNS = 20
+DEFAULT_BATCH = 2
+
+
+def _t_central(t, df):
+    '''P(|T| < t) of Student's t with integer df (Abramowitz & Stegun 26.7.3/26.7.4)'''
+    theta = math.atan(t / math.sqrt(df))
+    c2 = math.cos(theta) ** 2
+    if df % 2:
+        term = total = math.cos(theta)
+        for j in range(1, (df - 1) // 2):
+            term *= 2 * j / (2 * j + 1) * c2
+            total += term
+        return 2 / math.pi * (theta + (math.sin(theta) * total if df > 1 else 0))
+    term = total = 1.0
+    for j in range(1, df // 2):
+        term *= (2 * j - 1) / (2 * j) * c2
+        total += term
+    return math.sin(theta) * total
+
+
+def t_quantile(p, df):
+    '''Student t quantile: scipy's when it is installed, otherwise the exact one for integer df'''
+    if scipy_stats is not None:
+        return float(scipy_stats.t.ppf(p, df))
+    if p < 0.5:
+        return -t_quantile(1 - p, df)
+    #Closed forms; the normal approximations are far off with this few samples
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    #Bisection on the distribution function
+    target = 2 * p - 1
+    lo, hi = 0.0, 1.0
+    while _t_central(hi, df) < target:
+        lo, hi = hi, 2 * hi
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if _t_central(mid, df) < target:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def half_width(values, confidence):
+    '''Half-width of the confidence interval of the mean of values'''
+    if len(values) < 2:
+        return math.inf
+    t = t_quantile((1 + confidence) / 2, len(values) - 1)
+    return t * statistics.stdev(values) / math.sqrt(len(values))
+
+
+class ReplicatedPoint:
+    '''The replications of one sweep point'''
+
+    def __init__(self, params, seeds):
+        self.params = params        #point parameters without rngRun
+        self.seeds = list(seeds)    #seeds submitted so far
+        self.values = []            #one list of metric values per finished run
+        self.pending = 0
+        self.converged = False
+
+    def summary(self, metrics, confidence):
+        '''(mean, half-width) per metric'''
+        stats = []
+        for i in range(len(metrics)):
+            column = [values[i] for values in self.values]
+            mean = statistics.fmean(column) if column else math.nan
+            stats.append((mean, half_width(column, confidence)))
+        return stats
+
+
+class ReplicationManager:
+    '''Submits seeds for every point until its metrics' CIs are narrow enough'''
+
+    def __init__(self, executor, program, outputs, cache, metrics, target=DEFAULT_TARGET,
+                 confidence=DEFAULT_CONFIDENCE, min_runs=DEFAULT_MIN_RUNS, max_runs=DEFAULT_MAX_RUNS,
+                 batch=DEFAULT_BATCH):
+        self.executor = executor
+        self.program = program
+        self.outputs = outputs
+        self.cache = cache
+        self.metrics = [check_metric(name) for name in metrics]
+        self.target = target
+        self.confidence = confidence
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.batch = batch
+        self.points = []
+        self._lock = threading.RLock()
+
+    def add_point(self, params, first_seed):
+        point = ReplicatedPoint(params, range(first_seed, first_seed + self.min_runs))
+        self.points.append(point)
+        #A copy: cache hits can extend point.seeds while the first batch is submitted
+        self._submit(point, list(point.seeds))
+
+    def _submit(self, point, seeds):
+        #Count the whole batch first, cache hits finish before the next seed is submitted
+        with self._lock:
+            point.pending += len(seeds)
+        for seed in seeds:
+            params = dict(point.params, rngRun=seed)
+            job = submit_cached(self.executor, self.program, self.outputs, self.cache, params,
+                                callback=lambda job, params=params: self._finished(point, params))
+            if job is None:
+                #Cache hit, the output file is already there
+                self._finished(point, params)
+
+    def _finished(self, point, params):
+        output = self.outputs.output_path(params)
+        values = [read_metric(output, column) for column in self.metrics]
+        with self._lock:
+            point.pending -= 1
+            if None not in values:
+                point.values.append(values)
+            if point.pending > 0:
+                return
+            if self._precise(point) or len(point.seeds) >= self.max_runs:
+                point.converged = self._precise(point)
+                return
+            new_seeds = [max(point.seeds) + 1 + i
+                         for i in range(min(self.batch, self.max_runs - len(point.seeds)))]
+            point.seeds.extend(new_seeds)
+        self._submit(point, new_seeds)
+
+    def _precise(self, point):
+        if len(point.values) < 2:
+            return False
+        for mean, width in point.summary(self.metrics, self.confidence):
+            if width > self.target * abs(mean) and width > 0:
+                return False
+        return True
+
+    def write_summary(self, filename):
+        '''One CSV row per point: parameters, runs, then mean and CI half-width per metric'''
+        names = list(self.points[0].params) if self.points else []
+        header = names + ['runs', 'converged']
+        for column in self.metrics:
+            header += [f'mean{column}', f'ci{column}']
+        lines = [','.join(header)]
+        for point in self.points:
+            row = [str(point.params[name]) for name in names]
+            row += [str(len(point.values)), str(int(point.converged))]
+            for mean, width in point.summary(self.metrics, self.confidence):
+                row += [repr(mean), repr(width)]
+            lines.append(','.join(row))
+        atomic_write(filename, '\n'.join(lines) + '\n')
+        runs = sum(len(point.seeds) for point in self.points)
+        converged = sum(point.converged for point in self.points)
+        print(f'{runs} replications over {len(self.points)} points, '
+              f'{converged} reached the target CI')
+
+
+def replicate(executor, program, outputs, cache, runs, **options):
+    '''Replicates every distinct point of runs (ignoring rngRun); returns the manager'''
+    manager = ReplicationManager(executor, program, outputs, cache, **options)
+    seen = set()
+    for params in runs:
+        point = {name: value for name, value in params.items() if name != 'rngRun'}
+        key = tuple(point.items())
+        if key in seen:
+            continue
+        seen.add(key)
+        manager.add_point(point, params['rngRun'])
+    executor.run()
+    return manager
@@ -0,0 +1,189 @@
+"""
+Run-scoped output files and the merge stage that combines them.
+
+The examples append their summary line to one shared file (wifi-mld.dat/wifi-dcf.dat)
+in the working directory, so concurrent runs can interleave lines. RunOutputs gives every
+sweep point its own --outputFile under <results dir>/runs, remembers which parameters
+produced it, and merges the per-run files afterwards into one data file ordered by the
+run parameters, so rows stay aligned and no per-column re-sorting is needed.
+
+Results are written to a hidden .partial-<name> directory next to the final one and
+only renamed to <name> by publish(), so a results directory that exists is complete;
+an interrupted sweep leaves its .partial- directory behind to be resumed.
+
+Usage:
+    outputs = RunOutputs(dir, 'wifi-mld.dat')
+    for l in lambdas:
+        params = {'rngRun': 1, 'mldPerNodeLambda': l}
+        executor.submit(program.command(dict(params, outputFile=outputs.path(params))))
+    executor.run()
+    outputs.merge()
+    outputs.publish()
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+from utils.journal import SweepJournal
+from utils.store import is_header
+
+
+def run_key(params):
+    '''Short stable identifier for a parameter set'''
+    encoded = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode()).hexdigest()[:12]
+
+
+#What to do with a file a driver is about to replace: remove it, keep it, or stop
+OVERWRITE_POLICIES = ('remove', 'keep', 'fail')
+DEFAULT_OVERWRITE = os.environ.get('EXPERIMENTS_OVERWRITE', 'keep')
+
+#Prefix of results directories that are still being written
+PARTIAL_PREFIX = '.partial-'
+
+
+def check_and_remove(filename, policy=DEFAULT_OVERWRITE):
+    '''Applies the overwrite policy to an existing file, without prompting'''
+    if not os.path.exists(filename):
+        return
+    if policy == 'remove':
+        os.remove(filename)
+        print(f"Removed {filename}")
+    elif policy == 'keep':
+        print(f"Keeping existing {filename}")
+    elif policy == 'fail':
+        print(f"{filename} exists, exiting (overwrite policy 'fail')")
+        sys.exit(1)
+    else:
+        raise ValueError(f'Unknown overwrite policy {policy!r}, use one of {OVERWRITE_POLICIES}')
+
+
+def partial_dir(results_dir):
+    '''Directory a results directory is written to until it is published'''
+    parent, name = os.path.split(os.path.normpath(results_dir))
+    return os.path.join(parent, PARTIAL_PREFIX + name)
+
+
+def atomic_write(filename, data):
+    '''Writes data to filename via a temporary file and rename, so readers never see a partial file'''
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+class RunOutputs:
+    '''Allocates one output file per run under <results_dir>/runs and merges them.
+
+    Files go to the .partial- directory of results_dir until publish(); results_dir is
+    the directory they are being written to. Run states are journaled in journal.db;
+    reopening a directory (published or partial) resumes it, runs that are already done
+    are not started again.
+    '''
+
+    def __init__(self, results_dir, filename):
+        self.final_dir = results_dir
+        self.filename = filename
+        self.ext = os.path.splitext(filename)[1] or '.dat'
+        #A published directory that is reopened is updated in place
+        self._set_dir(results_dir if os.path.isdir(results_dir) else partial_dir(results_dir))
+        os.makedirs(self.runs_dir, exist_ok=True)
+        self.journal = SweepJournal(os.path.join(self.results_dir, 'journal.db'))
+        self._order = 0
+
+    def _set_dir(self, results_dir):
+        self.results_dir = results_dir
+        self.runs_dir = os.path.join(results_dir, 'runs')
+        self.merged_file = os.path.join(results_dir, self.filename)
+
+    def publish(self):
+        '''Renames the finished directory to its final name; returns that name'''
+        if self.results_dir != self.final_dir:
+            self.journal.close()
+            os.rename(self.results_dir, self.final_dir)
+            self._set_dir(self.final_dir)
+            self.journal = SweepJournal(os.path.join(self.results_dir, 'journal.db'))
+        return self.final_dir
+
+    def output_path(self, params):
+        '''Output path of the run with these parameters, without recording it'''
+        return os.path.join(self.runs_dir, run_key(params) + self.ext)
+
+    def log_path(self, params):
+        '''File the run's stdout and stderr are written to'''
+        return os.path.join(self.runs_dir, run_key(params) + '.log')
+
+    def path(self, params):
+        '''Output path for the run with these parameters; records them next to it'''
+        meta = os.path.join(self.runs_dir, run_key(params) + '.json')
+        atomic_write(meta, json.dumps({'order': self._order, 'params': params}, default=str))
+        self._order += 1
+        self.journal.queued(run_key(params), params)
+        return self.output_path(params)
+
+    def done(self, params):
+        '''True if the run finished in an earlier pass over this directory'''
+        return (self.journal.status(run_key(params)) == 'done'
+                and os.path.exists(self.output_path(params)))
+
+    def started(self, params):
+        self.journal.started(run_key(params))
+
+    def finished(self, params, status, returncode=None):
+        self.journal.finished(run_key(params), status, returncode)
+
+    def runs(self):
+        '''List of (params, output file) in the order the runs were allocated'''
+        runs = []
+        for name in os.listdir(self.runs_dir):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(self.runs_dir, name)) as f:
+                meta = json.load(f)
+            output = os.path.join(self.runs_dir, name[:-len('.json')] + self.ext)
+            runs.append((meta['order'], meta['params'], output))
+        runs.sort(key=lambda run: run[0])
+        return [(params, output) for _, params, output in runs]
+
+    def merge(self, sort_by=None):
+        '''Concatenates the per-run files into the merged data file.
+
+        Runs are ordered by the values of the sort_by parameters (allocation order by
+        default). Returns the list of parameter sets without a finished output file;
+        partial files of failed runs are left out.
+        '''
+        runs = self.runs()
+        if sort_by:
+            runs.sort(key=lambda run: tuple(run[0][name] for name in sort_by))
+        missing = []
+        chunks = []
+        header = None
+        for params, output in runs:
+            if not self.done(params):
+                missing.append(params)
+                continue
+            with open(output) as f:
+                data = f.read()
+            if data and not data.endswith('\n'):
+                data += '\n'
+            #Runs written with --summaryFormat=csv-header each start with the same header line
+            first, _, rest = data.partition('\n')
+            if first and not first.startswith('{') and is_header(first.split(',')):
+                if header is None:
+                    header = first
+                elif first == header:
+                    data = rest
+            chunks.append(data)
+        atomic_write(self.merged_file, ''.join(chunks))
+        if missing:
+            print(f'{len(missing)} runs produced no output, e.g. {missing[0]}')
+        return missing
@@ -0,0 +1,149 @@
+"""
+Runtimes learned from finished jobs, for sweep ETAs and longest-first scheduling.
+
+Every job that finishes successfully adds its wall time to the statistics of its
+program. The progress display (utils/progress.py) uses the mean to estimate how much
+work is left before a sweep has finished enough jobs of its own to measure throughput,
+so a 200-point grid gets a sensible ETA from the first minute.
+
+The runtime of single-bss-mld grows steeply with nMldSta and mldPerNodeLambda, so a
+per-program mean says little about a single point. RuntimePredictor fits log(wall time)
+linearly on the (log-scaled) numeric parameters of the runs that the sweep journals
+under the results trees record as done. SweepExecutor starts the jobs with the longest
+predicted runtime first, so the slow high-load points no longer start last and stretch
+the sweep.
+
+The per-program statistics are kept in results/cache/runtime-model.json next to the
+memory model; the fits are redone from the journals once per sweep.
+"""
+
+import json
+import math
+import os
+import threading
+
+import numpy as np
+
+from utils.cache import DEFAULT_CACHE_DIR, ensure_cache_dir
+from utils.catalog import results_roots
+from utils.journal import wall_times
+from utils.results import atomic_write
+
+DEFAULT_MODEL_FILE = os.path.join(DEFAULT_CACHE_DIR, 'runtime-model.json')
+
+#Seeds change the outcome of a run, not its cost
+IGNORED_PARAMS = ('rngRun',)
+
+#Fewer journaled runs than this (or than parameters + 2) and the per-program mean is used
+MIN_SAMPLES = 5
+
+
+def journaled_runs(program, roots=None):
+    '''[(params, seconds)] of the done runs of program in every journal under the results trees.
+
+    The program of a results directory is taken from the spec.json run_spec writes there.
+    '''
+    samples = []
+    for root in results_roots() if roots is None else roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in ('runs', 'cache')]
+            if 'journal.db' not in filenames or 'spec.json' not in filenames:
+                continue
+            try:
+                with open(os.path.join(dirpath, 'spec.json')) as f:
+                    if json.load(f).get('program') != program:
+                        continue
+            except (OSError, ValueError):
+                continue
+            samples += wall_times(os.path.join(dirpath, 'journal.db'))
+    return samples
+
+
+class RuntimePredictor:
+    '''Least-squares fit of log(wall time) on the numeric parameters of one program'''
+
+    def __init__(self, samples):
+        numeric = {}
+        for params, _ in samples:
+            for name, value in params.items():
+                if name not in IGNORED_PARAMS and isinstance(value, (int, float)):
+                    numeric.setdefault(name, []).append(value)
+        #Parameters every run has; swept rates and counts are fitted on a log scale
+        self.names = sorted(name for name, values in numeric.items() if len(values) == len(samples))
+        self.log_scaled = {name: min(numeric[name]) > 0 for name in self.names}
+        self.coef = None
+        if len(samples) < max(MIN_SAMPLES, len(self.names) + 2):
+            return
+        X = np.array([self._features(params) for params, _ in samples])
+        y = np.log([seconds for _, seconds in samples])
+        self.coef = np.linalg.lstsq(X, y, rcond=None)[0]
+
+    def _features(self, params):
+        row = [1.0]
+        for name in self.names:
+            value = float(params[name])
+            row.append(math.log10(value) if self.log_scaled[name] else value)
+        return row
+
+    def predict(self, params):
+        '''Predicted wall time in seconds, or None without a fit or for unknown parameters'''
+        if self.coef is None:
+            return None
+        try:
+            features = self._features(params)
+        except (KeyError, TypeError, ValueError):
+            return None
+        return math.exp(min(float(np.dot(self.coef, features)), 50))
+
+
+class RuntimeModel:
+    '''Count, mean and maximum wall time per program (or any job key), plus a
+    RuntimePredictor per program fitted from the journals under roots'''
+
+    def __init__(self, filename=DEFAULT_MODEL_FILE, roots=None):
+        self.filename = filename
+        self.roots = roots
+        self._lock = threading.Lock()
+        self.stats = {}
+        self._predictors = {}
+        if filename and os.path.exists(filename):
+            try:
+                with open(filename) as f:
+                    self.stats = json.load(f)
+            except (OSError, ValueError):
+                print(f'Ignoring unreadable runtime model {filename}')
+
+    def estimate(self, key):
+        '''Expected wall time in seconds of a job with this key, or None if never measured'''
+        with self._lock:
+            stats = self.stats.get(key) if key is not None else None
+        return stats['mean'] if stats else None
+
+    def predict(self, key, params=None):
+        '''Expected wall time of a job with these parameters, falling back to the mean'''
+        if key is not None and params:
+            with self._lock:
+                if key not in self._predictors:
+                    self._predictors[key] = RuntimePredictor(journaled_runs(key, self.roots))
+                predictor = self._predictors[key]
+            seconds = predictor.predict(params)
+            if seconds is not None:
+                return seconds
+        return self.estimate(key)
+
+    def record(self, key, seconds):
+        if key is None or seconds is None:
+            return
+        with self._lock:
+            stats = self.stats.setdefault(key, {'count': 0, 'mean': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['mean'] += (seconds - stats['mean']) / stats['count']
+            stats['max'] = max(stats['max'], seconds)
+
+    def save(self):
+        if not self.filename:
+            return
+        with self._lock:
+            data = json.dumps(self.stats, indent=2, sort_keys=True)
+        ensure_cache_dir(os.path.dirname(self.filename))
+        atomic_write(self.filename, data)
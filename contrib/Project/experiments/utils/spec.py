@@ -0,0 +1,212 @@
+"""
+Declarative experiment specs and the engine that runs them.
+
+A spec file (TOML, JSON or YAML) holds one table per experiment:
+
+    [P1b]
+    program = "single-bss-mld"          # ./ns3 program shortcut
+    output = "wifi-mld.dat"             # summary file the program appends to
+    seed = 1                            # first --rngRun
+    replications = 1                    # --rngRun = seed, seed+1, ...
+    params = { payloadSize = 1500 }     # fixed arguments
+    sweep = [                           # axes, outermost first (Cartesian product)
+        { nMldSta = { range = [5, 31, 5] } },
+        { mldPerNodeLambda = { logrange = [-4.0, 0, 0.5] } },
+    ]
+
+An axis is a list of values, { range = [start, stop, step] } (np.arange) or
+{ logrange = [start, stop, step] } (10 ** np.arange). { zip = { a = [...], b = [...] } }
+steps several axes together instead of crossing them. Replications are the innermost axis.
+An [<name>.adaptive] table turns the grid into the coarse pass of a saturation-point
+search (see utils/adaptive.py), a [<name>.replicate] table adds --rngRun seeds per point
+until the chosen metrics' confidence intervals are narrow enough (see utils/replication.py).
+
+Usage:
+    specs = load_spec('specs/Lab2.toml')
+    dir = run_spec(specs['P1b'], 'results/Lab2', 'P1b')
+"""
+
+import itertools
+import json
+import math
+import os
+from datetime import datetime
+
+from utils.adaptive import refine_knee, write_saturation
+from utils.cache import ResultCache, submit_cached
+from utils.ns3_target import Ns3Target
+from utils.replication import replicate
+from utils.results import PARTIAL_PREFIX, RunOutputs, atomic_write, partial_dir
+from utils.sweep import SweepExecutor
+
+#Directory holding the lab spec files
+SPEC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'specs')
+
+
+def load_spec(filename):
+    '''Reads a spec file; returns {experiment name: spec}'''
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.json':
+        with open(filename) as f:
+            return json.load(f)
+    if ext == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            #Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise RuntimeError(f'Reading {filename} needs Python 3.11+ or the tomli package') from None
+        with open(filename, 'rb') as f:
+            return tomllib.load(f)
+    if ext in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f'Reading {filename} needs the PyYAML package') from None
+        with open(filename) as f:
+            return yaml.safe_load(f)
+    raise ValueError(f'Unknown spec format: {filename} (use .toml, .json or .yaml)')
+
+
+def arange(start, stop, step):
+    '''Same values as np.arange(start, stop, step), without needing numpy'''
+    count = max(0, math.ceil((stop - start) / step))
+    #numpy steps by the delta between the first two values, not by step itself
+    delta = (start + step) - start
+    return [start + i * delta for i in range(count)]
+
+
+def axis_values(name, values):
+    '''Expands one axis definition into its list of values'''
+    if isinstance(values, list):
+        return values
+    if isinstance(values, dict) and len(values) == 1:
+        kind, bounds = next(iter(values.items()))
+        if kind == 'range':
+            return arange(*bounds)
+        if kind == 'logrange':
+            return [10 ** n for n in arange(*bounds)]
+    raise ValueError(f'Bad values for axis {name}: {values!r} (expected a list, range or logrange)')
+
+
+def expand_axis(entry):
+    '''One sweep entry -> list of {name: value} dicts'''
+    if 'zip' in entry:
+        axes = {name: axis_values(name, values) for name, values in entry['zip'].items()}
+        lengths = {len(values) for values in axes.values()}
+        if len(lengths) > 1:
+            raise ValueError(f'Zipped axes {list(axes)} have different lengths')
+        return [dict(zip(axes, point)) for point in zip(*axes.values())]
+    axes = {name: axis_values(name, values) for name, values in entry.items()}
+    return [dict(zip(axes, point)) for point in itertools.product(*axes.values())]
+
+
+def expand(spec):
+    '''List of parameter dicts for every run of the spec, in sweep order'''
+    axes = [expand_axis(entry) for entry in spec.get('sweep', [])]
+    seed = spec.get('seed', 1)
+    axes.append([{'rngRun': seed + i} for i in range(spec.get('replications', 1))])
+    runs = []
+    for point in itertools.product(*axes):
+        params = dict(spec.get('params', {}))
+        for values in point:
+            params.update(values)
+        runs.append(params)
+    return runs
+
+
+def find_resumable(parent, spec):
+    '''Most recent results directory under parent (published or still partial) that was
+    produced by this same spec; returns its final name'''
+    if not os.path.isdir(parent):
+        return None
+    #Round-trip through JSON so the comparison matches what spec.json holds
+    spec = json.loads(json.dumps(spec))
+    timestamps = {name[len(PARTIAL_PREFIX):] if name.startswith(PARTIAL_PREFIX) else name: name
+                  for name in os.listdir(parent)}
+    for timestamp in sorted(timestamps, reverse=True):
+        spec_file = os.path.join(parent, timestamps[timestamp], 'spec.json')
+        if not os.path.exists(spec_file):
+            continue
+        with open(spec_file) as f:
+            if json.load(f) == spec:
+                return os.path.join(parent, timestamp)
+    return None
+
+
+def latest_results(spec, results_dir, name):
+    '''Most recent results directory of this spec that holds a merged data file'''
+    dir = find_resumable(os.path.join(results_dir, name), spec)
+    if dir is not None and not os.path.isdir(dir):
+        #Not published yet, the merged file covers the runs that did finish
+        dir = partial_dir(dir)
+    if dir is None or not os.path.exists(os.path.join(dir, spec['output'])):
+        raise FileNotFoundError(f'No results of {name} in {results_dir}, run it first')
+    return dir
+
+
+def run_spec(spec, results_dir, name, max_workers=None, resume=False, run=True):
+    '''Runs every point of the spec; returns the timestamped results directory.
+
+    Output is merged into <results_dir>/<name>/<timestamp>/<output>, and the spec is
+    saved next to it so the directory documents how it was produced. The directory only
+    appears once the sweep has finished (see RunOutputs.publish). With resume, the
+    latest directory of the same spec is reused and its finished runs are skipped.
+    With run=False nothing is simulated, the latest results directory of the spec is
+    returned instead.
+    '''
+    for key in ('program', 'output'):
+        if key not in spec:
+            raise ValueError(f'Spec {name} has no {key!r}')
+    if not run:
+        return latest_results(spec, results_dir, name)
+    runs = expand(spec)
+    #Resolve and build the program once, then exec the binary for every point
+    program = Ns3Target(spec['program'])
+
+    dir = find_resumable(os.path.join(results_dir, name), spec) if resume else None
+    if dir is None:
+        #Experiment files go to a timestamped results directory, one output file per run
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        dir = os.path.join(results_dir, name, timestamp)
+    outputs = RunOutputs(dir, spec['output'])
+    if os.path.exists(os.path.join(outputs.results_dir, 'spec.json')):
+        print(f'{name}: resuming {outputs.results_dir}, journal: {outputs.journal.counts()}')
+    atomic_write(os.path.join(outputs.results_dir, 'spec.json'), json.dumps(spec, indent=2))
+    print(f'{name}: {len(runs)} runs of {spec["program"]}')
+
+    executor = SweepExecutor(max_workers=max_workers)
+    #Points already simulated with this code are copied from the cache
+    cache = ResultCache()
+    if 'adaptive' in spec and 'replicate' in spec:
+        raise ValueError(f'Spec {name} can use adaptive or replicate, not both')
+    if 'adaptive' in spec:
+        #The grid is only the coarse pass, then each curve's throughput knee is refined
+        axis = spec['adaptive']['axis']
+        searches = refine_knee(executor, program, outputs, cache, runs, **spec['adaptive'])
+        write_saturation(searches, axis, os.path.join(outputs.results_dir, 'saturation.csv'))
+        #Refined points were added last, so order rows by curve and load
+        sort_by = [name for name in runs[0] if name not in (axis, 'rngRun')] + [axis, 'rngRun']
+    elif 'replicate' in spec:
+        #Seeds are added per point until the metrics' confidence intervals are narrow enough
+        manager = replicate(executor, program, outputs, cache, runs, **spec['replicate'])
+        manager.write_summary(os.path.join(outputs.results_dir, 'replication.csv'))
+        #Extra seeds were added last, so keep each point's replications together
+        sort_by = [name for name in runs[0] if name != 'rngRun'] + ['rngRun']
+    else:
+        for params in runs:
+            submit_cached(executor, program, outputs, cache, params)
+        #Wait for every point to finish
+        executor.run()
+        sort_by = None
+
+    #Merge the per-run files into one data file, in sweep order
+    missing = outputs.merge(sort_by=sort_by)
+    #Only a complete directory gets its final name
+    if missing:
+        print(f'{name}: results stay in {outputs.results_dir} until the missing runs are '
+              f'completed with resume')
+        return outputs.results_dir
+    return outputs.publish()
@@ -0,0 +1,210 @@
+"""
+Columnar store for the summary rows of the examples, with named columns.
+
+The drivers read wifi-mld.dat with np.loadtxt, which parses all 49 columns of every row
+as text, and then pick columns by position (data[:,29] is the lambda, data[:,5] the
+aggregate throughput). write_table() converts a merged data file once into a columnar
+copy next to it: a Parquet file when pyarrow is installed, otherwise one .npy file per
+column. ResultsTable opens that copy lazily and only reads the columns that are asked
+for, by name.
+
+The programs can also write self-describing records (--summaryFormat=csv-header for a
+header line of column names, --summaryFormat=json for one JSON object per line). Those
+are read by name, whatever the order or number of columns; read_rows() handles both
+formats next to the unlabeled rows.
+
+Usage:
+    table = load_table(dir, 'wifi-mld.dat')
+    x = table['mldPerNodeLambda']
+    thpt = table['mldThptTotal']
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+#Summary row of single-bss-mld (wifi-mld.dat), in output order
+_LINKS = ('Link1', 'Link2', 'Total')
+WIFI_MLD_COLUMNS = (
+    [f'mldSuccPr{link}' for link in _LINKS]
+    + [f'mldThpt{link}' for link in _LINKS]
+    + [f'mldMeanQueDelay{link}' for link in _LINKS]
+    + [f'mldMeanAccDelay{link}' for link in _LINKS]
+    + [f'mldMeanE2eDelay{link}' for link in _LINKS]
+    + [f'mldSecondRawMomentAccDelay{link}' for link in _LINKS]
+    + [f'mldSecondCentralMomentAccDelay{link}' for link in _LINKS]
+    + ['rngRun', 'simulationTime', 'payloadSize', 'mcs', 'mcs2', 'channelWidth', 'channelWidth2',
+       'nMldSta', 'mldPerNodeLambda', 'mldProbLink1', 'mldAcLink1Int', 'mldAcLink2Int']
+    + [f'ac{ac}{field}Link{link}' for link in (1, 2) for ac in ('BE', 'BK', 'VI', 'VO')
+       for field in ('Cwmin', 'CwStage')]
+)
+
+#Summary row of single-bss-sld (wifi-dcf.dat); per-node rows are narrower and skipped
+WIFI_SLD_COLUMNS = ['sldSuccPr', 'sldThpt', 'sldMeanQueDelay', 'sldMeanAccDelay', 'sldMeanE2eDelay',
+                    'rngRun', 'simulationTime', 'payloadSize', 'mcs', 'channelWidth', 'nSld',
+                    'perSldLambda', 'acBECwmin', 'acBECwStage']
+
+#Summary row of Project/examples/final (wifi-dcf.dat), which also prints the access category
+WIFI_FINAL_COLUMNS = WIFI_SLD_COLUMNS[:12] + ['sldAcInt'] + WIFI_SLD_COLUMNS[12:]
+
+SCHEMAS = (WIFI_MLD_COLUMNS, WIFI_SLD_COLUMNS, WIFI_FINAL_COLUMNS)
+
+
+def _store_path(dat_file):
+    base = os.path.splitext(dat_file)[0]
+    return base + '.parquet' if pa is not None else base + '.columns'
+
+
+def is_header(fields):
+    '''Whether a csv line holds column names rather than values'''
+    try:
+        for value in fields:
+            float(value)
+    except ValueError:
+        return True
+    return False
+
+
+def read_records(dat_file):
+    '''(byte offset, {column: value}) of the self-describing records of a data file.
+
+    Data files of unlabeled rows have none. The per-node list of a json record is left out.
+    '''
+    records = []
+    header = None
+    offset = 0
+    with open(dat_file, 'rb') as f:
+        for line in f:
+            text = line.decode(errors='replace').strip()
+            if text.startswith('{'):
+                record = json.loads(text)
+                record.pop('nodes', None)
+                #null stands for nan and inf, which JSON can't represent
+                records.append((offset, {name: float('nan') if value is None else float(value)
+                                         for name, value in record.items()}))
+            elif text:
+                fields = text.split(',')
+                if is_header(fields):
+                    header = fields
+                elif header and len(fields) == len(header):
+                    records.append((offset, dict(zip(header, map(float, fields)))))
+            offset += len(line)
+    return records
+
+
+def record_schema(record):
+    '''The known schema with the columns of a record, or its own column names'''
+    for schema in SCHEMAS:
+        if set(schema) == set(record):
+            return list(schema)
+    return list(record)
+
+
+def read_rows(dat_file):
+    '''Rows of a summary data file as lists of floats, and the schema they match'''
+    records = read_records(dat_file)
+    if records:
+        schema = record_schema(records[0][1])
+        rows = [[record[name] for name in schema] for _, record in records if set(record) == set(schema)]
+        return rows, schema
+    with open(dat_file, newline='') as f:
+        rows = [row for row in csv.reader(f) if row]
+    widths = {len(schema): schema for schema in SCHEMAS}
+    #The summary rows are the widest known rows in the file
+    matching = sorted({len(row) for row in rows if len(row) in widths}, reverse=True)
+    if not matching:
+        raise ValueError(f'{dat_file} has no rows of a known schema')
+    schema = widths[matching[0]]
+    return [[float(value) for value in row] for row in rows if len(row) == len(schema)], schema
+
+
+def read_summary(dat_file):
+    '''{column: value} of the last summary row of a data file (e.g. one run's output)'''
+    rows, schema = read_rows(dat_file)
+    if not rows:
+        return None
+    return dict(zip(schema, rows[-1]))
+
+
+def write_table(dat_file):
+    '''Writes the columnar copy of a merged data file; returns its path'''
+    rows, schema = read_rows(dat_file)
+    data = np.array(rows, dtype=float).reshape(len(rows), len(schema))
+    path = _store_path(dat_file)
+    if pa is not None:
+        table = pa.table({name: data[:, i] for i, name in enumerate(schema)})
+        tmp = path + '.tmp'
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+        return path
+    #Columns are written to a new directory that replaces the old one, so an open table
+    #never sees a schema.json next to half-rewritten columns
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-')
+    for i, name in enumerate(schema):
+        np.save(os.path.join(tmp, name + '.npy'), np.ascontiguousarray(data[:, i]))
+    #Written last, so a store without it is incomplete
+    with open(os.path.join(tmp, 'schema.json'), 'w') as f:
+        json.dump({'columns': schema, 'rows': len(rows)}, f)
+    os.chmod(tmp, 0o755)
+    old = None
+    if os.path.exists(path):
+        old = tmp + '.old'
+        os.rename(path, old)
+    os.rename(tmp, path)
+    if old is not None:
+        shutil.rmtree(old)
+    return path
+
+
+class ResultsTable:
+    '''Lazily loaded, named columns of one results data file'''
+
+    def __init__(self, path):
+        self.path = path
+        self._columns = {}
+        if path.endswith('.parquet'):
+            if pa is None:
+                raise RuntimeError(f'Reading {path} needs the pyarrow package')
+            self.columns = list(pq.read_schema(path).names)
+        else:
+            with open(os.path.join(path, 'schema.json')) as f:
+                self.columns = json.load(f)['columns']
+
+    def __getitem__(self, name):
+        if name not in self.columns:
+            raise KeyError(f'{name} is not a column of {self.path}')
+        if name not in self._columns:
+            if self.path.endswith('.parquet'):
+                column = pq.read_table(self.path, columns=[name]).column(name)
+                self._columns[name] = column.to_numpy()
+            else:
+                self._columns[name] = np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+        return self._columns[name]
+
+    def select(self, *names):
+        '''{name: column} for the given columns only'''
+        return {name: self[name] for name in names}
+
+    def __len__(self):
+        return len(self[self.columns[0]])
+
+
+def load_table(results_dir, filename):
+    '''Opens the columnar copy of results_dir/filename, converting the data file if needed'''
+    dat_file = os.path.join(results_dir, filename)
+    path = _store_path(dat_file)
+    #schema.json is rewritten with every conversion, the directory's own mtime is not
+    stamp = path if path.endswith('.parquet') else os.path.join(path, 'schema.json')
+    if not os.path.exists(stamp) or os.path.getmtime(stamp) < os.path.getmtime(dat_file):
+        path = write_table(dat_file)
+    return ResultsTable(path)
@@ -0,0 +1,369 @@
+"""
+Bounded worker pool for running sweep points.
+
+The lab drivers used to start one multiprocessing.Process per parameter point, so a
+6x8 grid launched 48 simulators at once. SweepExecutor keeps a priority queue of
+points and only runs as many at a time as the machine can hold: at most one per core,
+and only while the memory the running jobs are expected to need (see utils/memory.py)
+stays under a fraction of the RAM that was free when the sweep started.
+
+While it runs, a status line shows how many jobs are done, running and queued and when
+the sweep should finish (see utils/progress.py). Jobs given a log file write their
+stdout and stderr there instead of into the terminal.
+
+With hosts (or EXPERIMENTS_HOSTS) set, jobs run on sweep agents on other machines
+instead of locally, one per agent slot (see utils/agent.py).
+
+Usage:
+    executor = SweepExecutor()
+    for l in lambdas:
+        executor.submit(f'./ns3 run "single-bss-mld --mldPerNodeLambda={l}"')
+    executor.run()
+"""
+
+import heapq
+import itertools
+import os
+import signal
+import subprocess
+import threading
+import time
+
+from utils.agent import DEFAULT_HOSTS, AgentLost, AgentPool
+from utils.memory import DEFAULT_JOB_MEMORY_MB, MemoryModel, available_memory_mb, process_group_memory_mb
+from utils.progress import SweepProgress
+from utils.runtime import RuntimeModel
+
+#Seconds to wait after SIGTERM before a job's process group is killed
+KILL_GRACE_PERIOD = 5
+
+#Share of the RAM free at the start of a sweep that running jobs may take
+DEFAULT_MEMORY_FRACTION = 0.8
+
+#Seconds between samples of a running job's memory
+MEMORY_SAMPLE_INTERVAL = 1.0
+
+
+def default_workers():
+    '''Number of concurrent jobs the machine can take: one per core (memory is admitted per job)'''
+    return os.cpu_count() or 1
+
+
+class Job:
+    '''One sweep point: a shell command plus its scheduling and exit information'''
+
+    def __init__(self, cmd, priority=0, timeout=None, cwd=None, env=None, callback=None,
+                 on_start=None, memory_key=None, runtime_key=None, log=None, params=None, files=()):
+        self.cmd = cmd
+        self.priority = priority
+        self.timeout = timeout
+        self.cwd = cwd
+        self.env = env
+        self.callback = callback    #called with the job once it has finished
+        self.on_start = on_start    #called with the job when its process is started
+        self.memory_key = memory_key    #jobs with the same key share a memory estimate
+        self.runtime_key = runtime_key  #jobs with the same key share a runtime estimate
+        self.log = log              #file the job's stdout and stderr go to
+        self.params = params        #run parameters, for the runtime prediction
+        self.files = list(files)    #output files to copy back when the job ran on another host
+        self.predicted_time = None  #wall time the runtime model expects
+        self.memory_mb = None       #estimate the job was admitted with
+        self.peak_memory_mb = None  #largest sampled resident size of its process group
+        self.returncode = None
+        self.error = None           #why the job could not be started
+        self.status = 'queued'      #queued -> running -> done/failed/timeout/cancelled
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def wall_time(self):
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def __repr__(self):
+        return f'Job({self.cmd!r}, status={self.status})'
+
+
+class SweepExecutor:
+    '''Runs submitted jobs with at most max_workers in flight.
+
+    Jobs with a higher priority are started first; among equal priorities the job with
+    the longest predicted runtime goes first (LPT), then submission order. Job
+    callbacks may submit further jobs while the sweep is running. Each job
+    runs in its own process group so a timeout or Ctrl-C tears down the whole
+    ./ns3 -> simulator tree instead of orphaning it.
+
+    A job is only started while the memory estimates of the running jobs plus its own
+    stay under memory_fraction of the RAM free at the start of run(); one job is always
+    allowed so an oversized program still runs, alone. Peaks measured while jobs run
+    update the memory model, wall times of finished jobs the runtime model.
+
+    With progress=True a live status line replaces the per-job messages. With hosts,
+    jobs run on agents with one worker per agent slot; max_workers and the memory limit
+    only apply to local runs.
+    '''
+
+    def __init__(self, max_workers=None, timeout=None, job_memory_mb=DEFAULT_JOB_MEMORY_MB,
+                 memory_fraction=DEFAULT_MEMORY_FRACTION, memory_model=None, runtime_model=None,
+                 progress=True, hosts=DEFAULT_HOSTS):
+        self.agents = AgentPool(hosts) if hosts else None
+        workers = default_workers()
+        #An explicit max_workers is an upper bound, never more than the machine can hold
+        self.max_workers = min(max_workers, workers) if max_workers else workers
+        if self.agents is not None:
+            self.max_workers = self.agents.slots
+        self.timeout = timeout
+        self.memory_fraction = memory_fraction
+        self.memory_model = memory_model or MemoryModel(default_mb=job_memory_mb)
+        self.runtime_model = runtime_model or RuntimeModel()
+        self.progress = SweepProgress(self) if progress else None
+        self._memory_budget_mb = None
+        self._memory_reserved_mb = 0
+        self.jobs = []
+        #Index in jobs of the first job of the current run(); earlier ones belong to past runs
+        self._run_first = 0
+        self._queue = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        #Signalled when a job is queued or finishes, so idle workers can pick up jobs that
+        #callbacks submit while the sweep is running
+        self._changed = threading.Condition(self._lock)
+        self._active = 0
+        self._running = {}
+        self._stopping = False
+
+    def submit(self, cmd, priority=0, timeout=None, cwd=None, env=None, callback=None, on_start=None,
+               memory_key=None, runtime_key=None, log=None, params=None, files=()):
+        '''Queues a command; returns its Job'''
+        job = Job(cmd, priority, timeout if timeout is not None else self.timeout, cwd, env, callback,
+                  on_start, memory_key, runtime_key, log, params, files)
+        job.predicted_time = self.runtime_model.predict(runtime_key, params)
+        with self._lock:
+            heapq.heappush(self._queue, (-priority, -(job.predicted_time or 0), next(self._counter), job))
+            self.jobs.append(job)
+            self._changed.notify()
+        return job
+
+    def _next_job(self):
+        '''Next job to run, or None once the queue is empty and no running job can add more'''
+        with self._lock:
+            while not self._stopping:
+                if self._queue and self._admit(self._queue[0][-1]):
+                    job = heapq.heappop(self._queue)[-1]
+                    self._active += 1
+                    self._memory_reserved_mb += job.memory_mb
+                    return job
+                if self._active == 0:
+                    return None
+                self._changed.wait()
+            return None
+
+    def _admit(self, job):
+        '''True if the job fits next to the running ones (called with the lock held)'''
+        job.memory_mb = self.memory_model.estimate(job.memory_key)
+        if self._active == 0 or self._memory_budget_mb is None:
+            return True
+        return self._memory_reserved_mb + job.memory_mb <= self._memory_budget_mb
+
+    def _message(self, text, always=False):
+        '''Prints a per-job message; with a status line only the ones marked always'''
+        if self.progress is None:
+            print(text)
+        elif always:
+            self.progress.message(text)
+
+    def _run_job(self, job):
+        self._message(f'Executing Command: {job.cmd}')
+        job.status = 'running'
+        job.start_time = time.time()
+        if job.on_start is not None:
+            try:
+                job.on_start(job)
+            except Exception as e:
+                self._message(f'Start callback for {job.cmd} failed: {e!r}', always=True)
+        if self.agents is not None:
+            self._run_remote(job)
+        else:
+            self._run_local(job)
+        if self._stopping and job.status != 'done':
+            job.status = 'cancelled'
+        if job.status == 'done':
+            self.memory_model.record(job.memory_key, job.peak_memory_mb)
+            self.runtime_model.record(job.runtime_key, job.wall_time)
+        self._message(f'Completed Command ({job.status}, {job.wall_time:.1f}s): {job.cmd}'
+                      + (f' [log: {job.log}]' if job.log and job.status != 'done' else ''),
+                      always=job.status in ('failed', 'timeout'))
+        if job.callback is not None:
+            #A failing callback must not take the worker thread down with it
+            try:
+                job.callback(job)
+            except Exception as e:
+                self._message(f'Callback for {job.cmd} failed: {e!r}', always=True)
+
+    def _run_remote(self, job):
+        '''Runs the job on an agent (the agent enforces the timeout)'''
+        try:
+            job.status, job.returncode = self.agents.run(job, job.files)
+        except AgentLost as e:
+            self._message(f'Could not run {job.cmd}: {e}', always=True)
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.end_time = time.time()
+
+    def _run_local(self, job):
+        output = None
+        try:
+            output = open(job.log, 'w') if job.log else None
+            proc = subprocess.Popen(job.cmd, shell=True, cwd=job.cwd, env=job.env,
+                                    start_new_session=True, stdout=output,
+                                    stderr=subprocess.STDOUT if output else None)
+        except OSError as e:
+            #Missing cwd, unwritable log directory: the job fails, the worker goes on
+            self._message(f'Could not start {job.cmd}: {e}', always=True)
+            job.error = str(e)
+            job.status = 'failed'
+            job.end_time = time.time()
+            return
+        finally:
+            #The child has its own copy of the descriptor
+            if output is not None:
+                output.close()
+        with self._lock:
+            self._running[job] = proc
+            stopping = self._stopping
+        if stopping:
+            #shutdown() ran between dequeuing and starting this job
+            self._kill(proc)
+        try:
+            job.returncode = self._wait(job, proc)
+            job.status = 'done' if job.returncode == 0 else 'failed'
+        except subprocess.TimeoutExpired:
+            self._kill(proc)
+            job.returncode = proc.wait()
+            job.status = 'timeout'
+        finally:
+            job.end_time = time.time()
+            with self._lock:
+                self._running.pop(job, None)
+
+    def _wait(self, job, proc):
+        '''Waits for the job's process, sampling its memory; returns the exit code'''
+        deadline = job.start_time + job.timeout if job.timeout is not None else None
+        while True:
+            interval = MEMORY_SAMPLE_INTERVAL
+            if deadline is not None:
+                interval = max(0, min(interval, deadline - time.time()))
+            try:
+                return proc.wait(timeout=interval)
+            except subprocess.TimeoutExpired:
+                if deadline is not None and time.time() >= deadline:
+                    raise
+            memory_mb = process_group_memory_mb(proc.pid)
+            if memory_mb is not None:
+                job.peak_memory_mb = max(job.peak_memory_mb or 0, memory_mb)
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._run_job(job)
+            except Exception as e:
+                #Whatever goes wrong fails this job, not the worker and the jobs queued behind it
+                self._message(f'Could not run {job.cmd}: {e!r}', always=True)
+                job.error = repr(e)
+                job.status = 'failed'
+                if job.end_time is None:
+                    job.end_time = time.time()
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._memory_reserved_mb -= job.memory_mb
+                    self._changed.notify_all()
+
+    @staticmethod
+    def _kill(proc):
+        '''SIGTERM the job's process group, then SIGKILL it if it doesn't exit'''
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=KILL_GRACE_PERIOD)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def shutdown(self):
+        '''Drops queued jobs and kills the running ones'''
+        with self._lock:
+            self._stopping = True
+            for *_, job in self._queue:
+                job.status = 'cancelled'
+            self._queue = []
+            running = list(self._running.values())
+            self._changed.notify_all()
+        for proc in running:
+            self._kill(proc)
+        if self.agents is not None:
+            self.agents.close()
+
+    def run(self):
+        '''Runs every queued job and blocks until they finish; returns the list of jobs.
+
+        A KeyboardInterrupt or SystemExit (e.g. from a driver's SIGINT handler) while
+        waiting cancels the queue and kills all running jobs before propagating.
+        '''
+        self._stopping = False
+        free_mb = available_memory_mb()
+        self._memory_budget_mb = free_mb * self.memory_fraction if free_mb is not None else None
+        #Every worker is started even for a short queue, callbacks may still add jobs
+        n_threads = self.max_workers if self._queue else 0
+        if self.agents is not None and n_threads:
+            #Memory on the hosts is theirs to manage
+            self._memory_budget_mb = None
+            self.agents.start()
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(n_threads)]
+        for t in threads:
+            t.start()
+        if self.progress is not None and threads:
+            self.progress.start()
+        try:
+            #Join with a timeout so signals are still delivered to the main thread
+            for t in threads:
+                while t.is_alive():
+                    t.join(0.5)
+        except BaseException:
+            self._message('Sweep interrupted, stopping running jobs', always=True)
+            self.shutdown()
+            for t in threads:
+                t.join()
+            raise
+        finally:
+            if self.progress is not None and threads:
+                self.progress.stop()
+            if self.agents is not None and n_threads:
+                self.agents.close()
+            self.memory_model.save()
+            self.runtime_model.save()
+            with self._lock:
+                run_jobs = self.jobs[self._run_first:]
+                self._run_first = len(self.jobs)
+        unfinished = [job for job in run_jobs if job.status in ('queued', 'running')]
+        if unfinished:
+            self._message(f'{len(unfinished)} jobs never finished, e.g. {unfinished[0].cmd}', always=True)
+        return self.jobs
+
+    def current_jobs(self):
+        '''Jobs submitted since the previous run() returned'''
+        with self._lock:
+            return self.jobs[self._run_first:]
+
+    def failed(self):
+        '''Jobs that did not finish with exit code 0, including ones that never finished'''
+        return [job for job in self.jobs if job.status != 'done']
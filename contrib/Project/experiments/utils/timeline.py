@@ -0,0 +1,98 @@
+"""
+Reader for the PPDU tx timelines single-bss-mld writes with --printRxStats=1.
+
+The text timeline (tx-timeline.txt) is CSV with millisecond start/end times, which
+loses sub-ms PPDU timing and gets huge for long runs. With --timelineFormat=binary the
+program writes tx-timeline.bin instead: a 16 byte header ("TXTL", version, record size,
+record count) followed by fixed-width little-endian records (TIMELINE_DTYPE). Those are
+memory-mapped as a NumPy structured array, so millions of PPDUs open instantly and only
+the pages that are touched are read.
+
+status is 0 for a PPDU received successfully, the ns-3 WifiPhyRxfailureReason code for
+a dropped one, or PAYLOAD_DECODE_ERROR when some of its MPDUs failed. There is one
+record per receiver of a PPDU.
+
+Usage:
+    tl = read_timeline('tx-timeline.bin')
+    busy = (tl['end'] - tl['start']).sum()
+    collided = tl[tl['status'] == PAYLOAD_DECODE_ERROR]
+"""
+
+import csv
+
+import numpy as np
+
+MAGIC = b'TXTL'
+VERSION = 1
+HEADER_SIZE = 16
+
+#One PPDU reception, as written by WriteBinaryTimeline in single-bss-mld.cc
+TIMELINE_DTYPE = np.dtype({
+    'names': ['start', 'end', 'sender', 'receiver', 'status', 'link'],
+    'formats': ['<i8', '<i8', '<u4', '<u4', 'u1', 'u1'],
+    'offsets': [0, 8, 16, 20, 24, 25],
+    'itemsize': 32,
+})
+
+SUCCESS = 0
+PAYLOAD_DECODE_ERROR = 255
+
+#WifiPhyRxfailureReason codes, in enum order, under the names ns-3 prints for them
+FAILURE_REASONS = ['UNKNOWN', 'UNSUPPORTED_SETTINGS', 'CHANNEL_SWITCHING', 'RXING', 'TXING', 'SLEEPING',
+                   'OFF', 'TRUNCATED_TX', 'BUSY_DECODING_PREAMBLE', 'PREAMBLE_DETECT_FAILURE',
+                   'RECEPTION_ABORTED_BY_TX', 'L_SIG_FAILURE', 'HT_SIG_FAILURE', 'SIG_A_FAILURE',
+                   'SIG_B_FAILURE', 'U_SIG_FAILURE', 'EHT_SIG_FAILURE', 'PREAMBLE_DETECTION_PACKET_SWITCH',
+                   'FRAME_CAPTURE_PACKET_SWITCH', 'OBSS_PD_CCA_RESET', 'PPDU_TOO_LATE', 'FILTERED',
+                   'DMG_HEADER_FAILURE', 'DMG_ALLOCATION_ENDED', 'SIGNAL_DETECTION_ABORTED_BY_TX']
+
+#Unknown ids in the text format (and ns-3's default for unset ones)
+UNSET_ID = 0xFFFFFFFF
+UNSET_LINK = 0xFF
+
+
+def status_name(code):
+    if code == SUCCESS:
+        return 'success'
+    if code == PAYLOAD_DECODE_ERROR:
+        return 'PayloadDecodeError'
+    return FAILURE_REASONS[code] if code < len(FAILURE_REASONS) else str(code)
+
+
+def read_binary_timeline(filename):
+    '''Memory-maps a binary timeline; returns a read-only structured array (TIMELINE_DTYPE)'''
+    with open(filename, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+        raise ValueError(f'{filename} is not a binary tx timeline')
+    version, record_size, count = np.frombuffer(header, '<u4', 3, 4)
+    if version != VERSION or record_size != TIMELINE_DTYPE.itemsize:
+        raise ValueError(f'{filename} has timeline version {version} with {record_size} byte records, '
+                         f'expected version {VERSION} with {TIMELINE_DTYPE.itemsize}')
+    if count == 0:
+        return np.zeros(0, TIMELINE_DTYPE)
+    return np.memmap(filename, TIMELINE_DTYPE, 'r', offset=HEADER_SIZE, shape=(int(count),))
+
+
+def read_text_timeline(filename):
+    '''Parses a text timeline (ms resolution, no receiver or link) into TIMELINE_DTYPE'''
+    codes = {status_name(code): code for code in range(len(FAILURE_REASONS))}
+    codes.update({'success': SUCCESS, 'PayloadDecodeError': PAYLOAD_DECODE_ERROR})
+    with open(filename, newline='') as f:
+        rows = list(csv.reader(f))[1:]
+    timeline = np.zeros(len(rows), TIMELINE_DTYPE)
+    timeline['receiver'] = UNSET_ID
+    timeline['link'] = UNSET_LINK
+    if rows:
+        start, end, sender, status = zip(*rows)
+        timeline['start'] = np.array(start, dtype=np.int64) * 1000000
+        timeline['end'] = np.array(end, dtype=np.int64) * 1000000
+        timeline['sender'] = np.array(sender, dtype=np.uint32)
+        timeline['status'] = [codes[name] if name in codes else int(name) for name in status]
+    return timeline
+
+
+def read_timeline(filename):
+    '''Binary or text timeline as a TIMELINE_DTYPE array'''
+    with open(filename, 'rb') as f:
+        binary = f.read(4) == MAGIC
+    return read_binary_timeline(filename) if binary else read_text_timeline(filename)
@@ -101,4 +101,11 @@ RngSeedManager::GetNextStreamIndex()
     return next;
 }
 
+void
+RngSeedManager::ResetNextStreamIndex()
+{
+    NS_LOG_FUNCTION_NOARGS();
+    g_nextStreamIndex = 0;
+}
+
 } // namespace ns3
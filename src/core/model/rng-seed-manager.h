@@ -93,6 +93,17 @@ class RngSeedManager
      * \returns The next stream index.
      */
     static uint64_t GetNextStreamIndex();
+
+    /**
+     * Reset the automatically assigned stream index to its initial value.
+     *
+     * Streams created afterwards get the same stream indices as in a
+     * fresh process.  This is meant for running several simulations one
+     * after another in one process (after Simulator::Destroy() and
+     * Config::Reset()); streams that still exist would share indices
+     * with the new ones.
+     */
+    static void ResetNextStreamIndex();
 };
 
 /** Alias for compatibility. */
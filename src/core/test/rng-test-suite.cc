@@ -465,6 +465,43 @@ RngParetoTestCase::DoRun()
     NS_TEST_ASSERT_MSG_LT(sum, maxStatistic, "Chi-squared statistic out of range");
 }
 
+/**
+ * \ingroup rng-tests
+ *
+ * Test case for resetting the automatically assigned stream index.
+ */
+class RngStreamIndexResetTestCase : public TestCase
+{
+  public:
+    RngStreamIndexResetTestCase();
+
+  private:
+    void DoRun() override;
+};
+
+RngStreamIndexResetTestCase::RngStreamIndexResetTestCase()
+    : TestCase("Reset of the automatically assigned stream index")
+{
+}
+
+void
+RngStreamIndexResetTestCase::DoRun()
+{
+    RngSeedManager::SetSeed(1);
+    RngSeedManager::ResetNextStreamIndex();
+    NS_TEST_ASSERT_MSG_EQ(RngSeedManager::GetNextStreamIndex(), 0, "First index after a reset");
+    NS_TEST_ASSERT_MSG_EQ(RngSeedManager::GetNextStreamIndex(), 1, "Indices keep incrementing");
+
+    // A stream created after a reset draws the same values as the first one of a fresh run
+    RngSeedManager::ResetNextStreamIndex();
+    Ptr<UniformRandomVariable> first = CreateObject<UniformRandomVariable>();
+    double value = first->GetValue();
+    first = nullptr;
+    RngSeedManager::ResetNextStreamIndex();
+    Ptr<UniformRandomVariable> second = CreateObject<UniformRandomVariable>();
+    NS_TEST_ASSERT_MSG_EQ(second->GetValue(), value, "Same stream after a reset");
+}
+
 /**
  * \ingroup rng-tests
  *
@@ -483,6 +520,7 @@ RngTestSuite::RngTestSuite()
     AddTestCase(new RngNormalTestCase, TestCase::Duration::QUICK);
     AddTestCase(new RngExponentialTestCase, TestCase::Duration::QUICK);
     AddTestCase(new RngParetoTestCase, TestCase::Duration::QUICK);
+    AddTestCase(new RngStreamIndexResetTestCase, TestCase::Duration::QUICK);
 }
 
 static RngTestSuite g_rngTestSuite; //!< Static variable for test initialization
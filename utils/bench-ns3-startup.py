@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Measure the startup overhead of the ns3 driver.
+
+Every simulation launched through ./ns3 pays for starting Python, parsing the command
+line and loading the CMake cache state before the target runs. This script times a few
+driver commands that do no work of their own and reports the median time of each
+minus the time of a bare Python interpreter.
+
+Usage:
+    ./utils/bench-ns3-startup.py
+    ./utils/bench-ns3-startup.py --program hello-simulator --check
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ns3_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median overhead over a bare interpreter, in milliseconds, that --check accepts
+DEFAULT_TARGET_MS = 100
+
+
+def time_command(command, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(
+            command,
+            cwd=ns3_path,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup overhead of ./ns3")
+    parser.add_argument(
+        "--program",
+        help="also time './ns3 run --no-build --dry-run PROGRAM' (needs a configured tree)",
+        default=None,
+    )
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=DEFAULT_TARGET_MS,
+        help="startup overhead accepted by --check (default %(default)s ms)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit with 1 if any command exceeds the target",
+    )
+    args = parser.parse_args()
+
+    ns3 = [sys.executable, os.path.join(ns3_path, "ns3")]
+    commands = [
+        ["show", "profile"],
+        ["--help"],
+        ["configure", "--help"],
+    ]
+    if args.program:
+        commands.append(["run", "--no-build", "--dry-run", args.program])
+
+    baseline = time_command([sys.executable, "-c", "pass"], args.repeats)
+    print("%-50s %8.1f ms" % ("python3 -c pass", baseline))
+
+    exceeded = False
+    for command in commands:
+        overhead = time_command(ns3 + command, args.repeats) - baseline
+        over_target = overhead > args.target_ms
+        exceeded |= over_target
+        print(
+            "%-50s %+8.1f ms%s"
+            % ("./ns3 " + " ".join(command), overhead, "  (over target)" if over_target else "")
+        )
+
+    if args.check and exceeded:
+        print("Startup overhead exceeds the %.0f ms target" % args.target_ms)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,13 +10,19 @@
 Test suite for the ns3 wrapper script
 """
 
+import contextlib
 import glob
+import importlib.machinery
+import importlib.util
+import io
+import json
 import os
 import platform
 import re
 import shutil
 import subprocess
 import sys
+import tempfile
 import unittest
 from functools import partial
 
@@ -184,6 +190,18 @@ def get_enabled_modules():
     return read_lock_entry("NS3_ENABLED_MODULES")
 
 
+def load_ns3_module():
+    """!
+    Loads a fresh copy of the ns3 wrapper script as a module, to test its helpers directly
+    @return the ns3 module.
+    """
+    loader = importlib.machinery.SourceFileLoader("ns3_wrapper", ns3_script)
+    spec = importlib.util.spec_from_loader("ns3_wrapper", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
 class DockerContainerManager:
     """!
     Python-on-whales wrapper for Docker-based ns-3 tests
@@ -658,6 +676,270 @@ class NS3CommonSettingsTestCase(unittest.TestCase):
         self.assertEqual(return_code, 1)
         self.assertIn("You need to configure ns-3 first: try ./ns3 configure", stdout)
 
+    def test_06_StartupOverhead(self):
+        """!
+        Test if the startup overhead of ns3 stays within the target of bench-ns3-startup.py.
+        Wall-clock timings are unreliable on loaded machines, so it only runs when
+        NS3_TEST_STARTUP_OVERHEAD is set
+        @return None
+        """
+        if not os.getenv("NS3_TEST_STARTUP_OVERHEAD"):
+            self.skipTest("Set NS3_TEST_STARTUP_OVERHEAD to check the startup overhead")
+
+        bench_script = os.sep.join([ns3_path, "utils", "bench-ns3-startup.py"])
+        return_code, stdout, stderr = run_program(bench_script, "--check --repeats 5", python=True)
+        self.assertEqual(return_code, 0, stdout)
+        self.assertIn("./ns3 show profile", stdout)
+
+    def test_07_ProgramShortcutsCache(self):
+        """!
+        Test if the program shortcuts are cached next to the lock file and rebuilt when it changes
+        @return None
+        """
+        ns3 = load_ns3_module()
+
+        def remove_leftovers():
+            for leftover in [ns3.lock_file, ns3.shortcuts_file]:
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+        self.addCleanup(remove_leftovers)
+
+        def write_lock_file(names):
+            scratch_dir = os.sep.join([ns3.out_dir, "scratch"])
+            programs = [os.sep.join([scratch_dir, "ns3.43-%s-default" % name]) for name in names]
+            with open(ns3.lock_file, "w", encoding="utf-8") as f:
+                f.write("ns3_runnable_programs = %r\nns3_runnable_scripts = []\n" % programs)
+            return programs
+
+        builds = []
+        build_program_shortcuts = ns3.build_program_shortcuts
+
+        def count_builds(*args):
+            builds.append(args)
+            return build_program_shortcuts(*args)
+
+        ns3.build_program_shortcuts = count_builds
+
+        # The first lookup builds the map and caches it
+        (program,) = write_lock_file(["first"])
+        programs = ns3.get_program_shortcuts("default", "3.43")
+        self.assertEqual(programs["first"], [program])
+        self.assertEqual(programs[os.sep.join(["scratch", "first"])], [program])
+        self.assertEqual(len(builds), 1)
+        self.assertTrue(os.path.exists(ns3.shortcuts_file))
+
+        # Later lookups, also from other invocations, reuse the cached map
+        self.assertEqual(ns3.get_program_shortcuts("default", "3.43"), programs)
+        self.assertEqual(len(builds), 1)
+        other_ns3 = load_ns3_module()
+        other_ns3.build_program_shortcuts = None
+        self.assertEqual(other_ns3.get_program_shortcuts("default", "3.43"), programs)
+
+        # A different build profile or a new lock file invalidate it
+        ns3.get_program_shortcuts("release", "3.43")
+        self.assertEqual(len(builds), 2)
+        write_lock_file(["first", "second"])
+        programs = ns3.get_program_shortcuts("default", "3.43")
+        self.assertIn("second", programs)
+        self.assertEqual(len(builds), 3)
+
+        # A corrupt cache is rebuilt and replaced
+        with open(ns3.shortcuts_file, "w", encoding="utf-8") as f:
+            f.write("{")
+        self.assertEqual(ns3.get_program_shortcuts("default", "3.43"), programs)
+        self.assertEqual(len(builds), 4)
+        with open(ns3.shortcuts_file, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["programs"], programs)
+
+    def test_08_BuildSkipsUpToDateTarget(self):
+        """!
+        Test if ns3 run only builds its target when the target may be out of date
+        @return None
+        """
+        ns3 = load_ns3_module()
+        # Removes the build lock file
+        self.addCleanup(run_ns3, "clean")
+        cmake_cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cmake_cache)
+        for cmake_file in ["CMakeCache.txt", "build.ninja"]:
+            open(os.path.join(cmake_cache, cmake_file), "w").close()
+        program = os.path.join(cmake_cache, "program")
+
+        builds = []
+
+        def cmake_build(current_cmake_cache_folder, output, jobs, target=None, **kwargs):
+            builds.append(target)
+            open(program, "w").close()
+
+        ns3.cmake_build = cmake_build
+
+        def build_and_count():
+            ns3.cmake_build_if_changed(cmake_cache, None, 1, "program", program, False)
+            return len(builds)
+
+        # The first run builds, the next ones find the target up to date
+        self.assertEqual(build_and_count(), 1)
+        self.assertEqual(build_and_count(), 1)
+
+        # A source modified since the last build
+        stamp = ns3.read_build_stamps(cmake_cache)["program"]["started"]
+        os.utime(os.path.join(cmake_cache, "CMakeCache.txt"), ns=(stamp, stamp))
+        self.assertEqual(build_and_count(), 2)
+        self.assertEqual(build_and_count(), 2)
+
+        # Build rules regenerated after the target was linked
+        older = os.stat(os.path.join(cmake_cache, "build.ninja")).st_mtime_ns - 10**9
+        os.utime(program, ns=(older, older))
+        self.assertEqual(build_and_count(), 3)
+
+        # A deleted target
+        os.remove(program)
+        self.assertEqual(build_and_count(), 4)
+        self.assertEqual(build_and_count(), 4)
+
+    def test_09_BatchRuns(self):
+        """!
+        Test the parsing of ns3 run --batch files and the exit code of a batch
+        @return None
+        """
+        ns3 = load_ns3_module()
+        batch_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, batch_dir)
+        batch_file = os.path.join(batch_dir, "runs.txt")
+
+        # Blank lines and comments are skipped, arguments are split like in a shell
+        with open(batch_file, "w", encoding="utf-8") as f:
+            f.write('# exit codes\n--first=1 --second="two words"\n\n  --third\n')
+        self.assertEqual(
+            ns3.read_batch_lines(batch_file),
+            [(2, ["--first=1", "--second=two words"]), (4, ["--third"])],
+        )
+
+        args = ns3.parse_args(["run", "program", "--batch", batch_file, "--batch-dir", batch_dir])
+        self.assertEqual(args.batch, batch_file)
+        self.assertEqual(args.batch_dir, batch_dir)
+        exit_with = [sys.executable, "-c", "import sys; sys.exit(int(sys.argv[1]))"]
+
+        def run_batch(lines):
+            with open(batch_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                return_code = ns3.run_batch(args, exit_with, os.environ.copy(), batch_dir)
+            return return_code, output.getvalue()
+
+        # Every run has its own directory, and the batch fails if any run fails
+        return_code, stdout = run_batch(["0", "0"])
+        self.assertEqual(return_code, 0)
+        self.assertIn("2 runs, 2 succeeded, 0 failed", stdout)
+        for run in ["run-0001", "run-0002"]:
+            self.assertTrue(os.path.exists(os.path.join(batch_dir, run, "output.log")))
+
+        return_code, stdout = run_batch(["0", "3"])
+        self.assertEqual(return_code, 1)
+        self.assertIn("line 2 failed with code 3", stdout)
+
+        # --batch is a run option only
+        return_code, stdout, stderr = run_ns3("shell --batch %s" % batch_file)
+        self.assertEqual(return_code, 1)
+        self.assertIn("Unknown options were given: --batch", stderr)
+
+    def test_10_LazySubparsers(self):
+        """!
+        Test if the arguments of every command parse the same when ns3 only builds
+        the options of the command being parsed as when it builds all of them
+        @return None
+        """
+        ns3 = load_ns3_module()
+        ns3_full_parser = load_ns3_module()
+        # Without a sub-command (e.g. for the main help) the options of every command are built
+        ns3_full_parser.find_subcommand = lambda argv: None
+
+        commands = [
+            "build",
+            "build core --dry-run",
+            "-j 2 build",
+            "--dry-run build",
+            "clean",
+            "configure -d release --enable-examples --disable-werror",
+            "configure -G Ninja --force-refresh -- -DNS3_LOG=ON",
+            "distclean",
+            "docs doxygen",
+            "install",
+            "run hello-simulator --no-build -- --verbose",
+            "--quiet run hello-simulator --batch runs.txt --rusage-json usage.json",
+            "shell",
+            "show profile",
+            "show config",
+            "uninstall",
+        ]
+        for command in commands:
+            with self.subTest(command=command):
+                argv = command.split()
+                self.assertEqual(vars(ns3.parse_args(argv)), vars(ns3_full_parser.parse_args(argv)))
+
+    def test_11_RusageJson(self):
+        """!
+        Test the records written by ns3 run --rusage-json, for a single run and for a batch
+        @return None
+        """
+        if not hasattr(os, "wait4"):
+            self.skipTest("--rusage-json is not supported on this platform")
+
+        ns3 = load_ns3_module()
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        rusage_json = os.path.join(output_dir, "usage", "rusage.json")
+        exit_with = [sys.executable, "-c", "import sys; sys.exit(int(sys.argv[1]))"]
+
+        record_schema = {
+            "command": str,
+            "returncode": int,
+            "wall_time_s": float,
+            "user_time_s": float,
+            "system_time_s": float,
+            "max_rss_kb": int,
+            "minor_page_faults": int,
+            "major_page_faults": int,
+            "voluntary_context_switches": int,
+            "involuntary_context_switches": int,
+        }
+
+        def check_record(record, returncode):
+            self.assertEqual(record["returncode"], returncode)
+            for key, value_type in record_schema.items():
+                self.assertIsInstance(record[key], value_type, key)
+            self.assertGreater(record["max_rss_kb"], 0)
+            self.assertGreaterEqual(record["wall_time_s"], 0)
+
+        # A single run writes one record, creating the directories of the file
+        returncode, usage = ns3.run_with_rusage(exit_with + ["2"])
+        self.assertEqual(returncode, 2)
+        ns3.write_rusage_json(rusage_json, usage)
+        with open(rusage_json, encoding="utf-8") as f:
+            record = json.load(f)
+        self.assertEqual(set(record), set(record_schema))
+        check_record(record, 2)
+        self.assertEqual(record["command"], " ".join(exit_with + ["2"]))
+
+        # A batch writes a list with a record per run, in the order of the batch file lines
+        batch_file = os.path.join(output_dir, "runs.txt")
+        with open(batch_file, "w", encoding="utf-8") as f:
+            f.write("0\n# comment\n1\n")
+        args = ns3.parse_args(
+            ["run", "program", "--batch", batch_file, "--rusage-json", rusage_json]
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            ns3.run_batch(args, exit_with, os.environ.copy(), output_dir)
+        with open(rusage_json, encoding="utf-8") as f:
+            records = json.load(f)
+        self.assertEqual([record["line"] for record in records], [1, 3])
+        for record, returncode in zip(records, [0, 1]):
+            self.assertEqual(set(record), set(record_schema) | {"line", "run_dir"})
+            check_record(record, returncode)
+            self.assertTrue(os.path.isdir(record["run_dir"]))
+
 
 class NS3ConfigureBuildProfileTestCase(unittest.TestCase):
     """!